@@ -0,0 +1,65 @@
+import time
+
+from cache import TTLCache
+
+# User.active values
+ACTIVE = 1
+INACTIVE = 0
+DELETED = 3
+
+
+# Per-request authentication caches. Verified token claims are cached by raw token until the
+# token expires (or token_ttl, if sooner), so a repeat request skips signature verification.
+# User status is cached for status_ttl and dropped as soon as it changes in this process;
+# the TTL bounds how long another worker can keep serving a stale status.
+class AuthCache:
+    def __init__(self, token_maxsize=10000, token_ttl=300.0, status_maxsize=10000, status_ttl=30.0):
+        self.tokens = TTLCache(maxsize=token_maxsize, ttl=token_ttl)
+        self.statuses = TTLCache(maxsize=status_maxsize, ttl=status_ttl)
+        self.verifications = 0
+        self.status_loads = 0
+
+    # Claims for the token; verify() decodes and verifies it on a miss and raises if invalid
+    def claims(self, token, verify):
+        claims = self.tokens.get(token)
+        if claims is None:
+            self.verifications += 1
+            claims = verify()
+            ttl = self.tokens.ttl
+            if "exp" in claims:
+                ttl = min(ttl, claims["exp"] - time.time())
+            if ttl > 0:
+                self.tokens.set(token, claims, ttl=ttl)
+        return claims
+
+    # User status; load(username) reads it from the database on a miss (None for unknown users)
+    async def status(self, username, load):
+        status = self.statuses.get(username)
+        if status is None:
+            self.status_loads += 1
+            status = await load(username)
+            if status is not None:
+                self.statuses.set(username, status)
+        return status
+
+    def invalidate_user(self, username):
+        self.statuses.delete(username)
+
+    def stats(self):
+        return {
+            "tokens": self.tokens.stats(),
+            "statuses": self.statuses.stats(),
+            "verifications": self.verifications,
+            "status_loads": self.status_loads,
+        }
+
+
+# Same messages login has always used for non-active accounts
+def status_error(status):
+    if status == INACTIVE:
+        return "User is inactive"
+    if status == DELETED:
+        return "User is deleted or archived"
+    if status != ACTIVE:
+        return "User not found"
+    return None
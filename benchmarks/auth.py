@@ -0,0 +1,95 @@
+# Per-request cost of authentication, measured in-process against a throwaway SQLite database
+# (or BENCHMARK_DATABASE_URL). Run from the repository root:
+#
+#     python -m benchmarks.auth --requests 2000
+#
+# Compares an unauthenticated route with the same route behind require_active_user, with the
+# token/status caches enabled and disabled (verify the JWT and read the user's status on every
+# request), and a password login with a refresh-token exchange.
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.harness import configure_database
+
+configure_database(os.getenv("BENCHMARK_DATABASE_URL"))
+
+import httpx
+from fastapi import Depends
+
+import app as books_app
+from auth import AuthCache
+
+USERNAME = "benchmark"
+PASSWORD = "benchmark-password"
+
+
+@books_app.app.get("/benchmark/open")
+async def open_route():
+    return {}
+
+
+@books_app.app.get("/benchmark/protected")
+async def protected_route(current_user: str = Depends(books_app.require_active_user)):
+    return {}
+
+
+async def create_user():
+    async with books_app.SessionLocal() as db:
+        db.add(books_app.User(username=USERNAME, password=books_app.get_password_hash(PASSWORD), active=1))
+        await db.commit()
+
+
+async def time_requests(client, method, path, requests, **kwargs):
+    latencies = []
+    for _ in range(requests):
+        started_at = time.perf_counter()
+        response = await client.request(method, path, **kwargs)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started_at)
+    latencies.sort()
+    return {
+        "p50_us": 1e6 * statistics.median(latencies),
+        "p95_us": 1e6 * latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Authentication overhead per request")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+
+    await books_app.startup()
+    await create_user()
+    transport = httpx.ASGITransport(app=books_app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        response = await client.post("/login/", json={"username": USERNAME, "password": PASSWORD})
+        response.raise_for_status()
+        tokens = response.json()
+        access = {"Authorization": f"Bearer {tokens['access_token']}"}
+        refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+
+        results = {"no auth": await time_requests(client, "GET", "/benchmark/open", args.requests)}
+        books_app.auth_cache = AuthCache(token_maxsize=0, status_maxsize=0)
+        results["auth, uncached"] = await time_requests(client, "GET", "/benchmark/protected", args.requests, headers=access)
+        books_app.auth_cache = AuthCache()
+        results["auth, cached"] = await time_requests(client, "GET", "/benchmark/protected", args.requests, headers=access)
+        results["login (bcrypt)"] = await time_requests(
+            client, "POST", "/login/", args.logins, json={"username": USERNAME, "password": PASSWORD}
+        )
+        results["refresh"] = await time_requests(client, "POST", "/refresh/", args.logins, headers=refresh)
+    await books_app.shutdown()
+
+    baseline = results["no auth"]["p50_us"]
+    for name, result in results.items():
+        print(
+            f"{name:<16}  p50={result['p50_us']:9.1f}us  p95={result['p95_us']:9.1f}us  "
+            f"overhead={result['p50_us'] - baseline:9.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
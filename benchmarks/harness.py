@@ -0,0 +1,73 @@
+# Shared setup for the benchmarks: a database (a throwaway SQLite file unless one is given),
+# a seeded synthetic catalog, and a stub Llama3 service. configure_database() must run before
+# the app is imported, since the engine is created at import time.
+import asyncio
+import json
+import os
+import random
+import tempfile
+
+import httpx
+
+GENRES = ["Fantasy", "Sci-Fi", "Mystery", "Romance", "Thriller", "History", "Biography", "Horror", "Poetry", "Drama"]
+WORDS = (
+    "young engineer coastal town remote station winter history crew alliance discovery secret empire war "
+    "detective murder city family letter journey mountain river ship storm queen king rebellion machine "
+    "memory island forest dragon magic school letter garden village love betrayal science planet signal"
+).split()
+
+
+def configure_database(url=None):
+    url = url or f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/benchmark.db"
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+# Stands in for the Llama3 service: answers after a fixed delay, echoing a prefix of the content
+def stub_summarizer_transport(latency_ms):
+    async def handler(request):
+        await asyncio.sleep(latency_ms / 1000)
+        content = json.loads(request.content)["content"]
+        return httpx.Response(200, json={"summary": content[:120]})
+    return httpx.MockTransport(handler)
+
+
+def synthetic_summary(rng, words=40):
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+# Insert books (titled "Book <n>") and reviews until the catalog has `books` books. Rating
+# aggregates are written with the rows, so no reconciliation is needed. Returns all book ids.
+async def seed_catalog(books_app, books, reviews_per_book, seed=0, chunk_size=1000):
+    from sqlalchemy import func, insert, select
+
+    Book, Review = books_app.Book, books_app.Review
+    rng = random.Random(seed)
+    async with books_app.SessionLocal() as db:
+        existing = await db.scalar(select(func.count(Book.id)))
+        for start in range(existing, books, chunk_size):
+            rows, ratings = [], []
+            for n in range(start, min(start + chunk_size, books)):
+                book_ratings = [rng.randint(1, 5) for _ in range(reviews_per_book)]
+                ratings.append(book_ratings)
+                rows.append({
+                    "title": f"Book {n}",
+                    "author": f"Author {rng.randrange(max(books // 10, 1))}",
+                    "genre": rng.choice(GENRES),
+                    "year_published": rng.randint(1900, 2024),
+                    "summary": synthetic_summary(rng),
+                    "review_count": len(book_ratings),
+                    "rating_sum": sum(book_ratings),
+                    "average_rating": sum(book_ratings) / len(book_ratings) if book_ratings else 0.0,
+                })
+            result = await db.execute(insert(Book).returning(Book.id, sort_by_parameter_order=True), rows)
+            reviews = [
+                {"book_id": book_id, "user_id": rng.randint(1, 10000), "review_text": synthetic_summary(rng, 12), "rating": rating}
+                for book_id, book_ratings in zip(result.scalars().all(), ratings)
+                for rating in book_ratings
+            ]
+            if reviews:
+                await db.execute(insert(Review), reviews)
+            await db.commit()
+        result = await db.execute(select(Book.id).order_by(Book.id))
+        return result.scalars().all()
@@ -0,0 +1,205 @@
+# Load test for the API hot paths. Runs the app in-process against a seeded synthetic catalog
+# (a throwaway SQLite file, or --database-url for a local Postgres) with a stub Llama3 service,
+# drives each scenario at each concurrency level, and writes RPS and latency percentiles as JSON.
+# Run from the repository root:
+#
+#     python -m benchmarks.run --books 10000 --concurrency 1 16 64 --output results.json
+#     python -m benchmarks.run --books 10000 --concurrency 1 16 64 --compare results.json
+#
+# --compare exits non-zero when any scenario's RPS drops or p99 rises by more than --threshold.
+# The client shares the event loop with the app, so absolute numbers include client overhead;
+# compare runs made on the same machine with the same arguments.
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.harness import configure_database, seed_catalog, stub_summarizer_transport, synthetic_summary
+
+SCENARIOS = ["get_books", "get_book", "get_reviews", "get_recommendations", "create_books", "generate_summary"]
+
+
+# Each scenario returns (method, url, json body) for one request
+def make_request(scenario, catalog, rng, args):
+    if scenario == "get_books":
+        # Half first pages, half pages starting at a random cursor
+        cursor = f"&cursor={catalog['encode_cursor'](rng.choice(catalog['ids']))}" if rng.random() < 0.5 else ""
+        return "GET", f"/books/?limit=50{cursor}", None
+    if scenario == "get_book":
+        return "GET", f"/books/{rng.choice(catalog['ids'])}", None
+    if scenario == "get_reviews":
+        return "GET", f"/books/{rng.choice(catalog['ids'])}/reviews?limit=50", None
+    if scenario == "get_recommendations":
+        return "GET", f"/recommendations/?book_title=Book {rng.randrange(len(catalog['ids']))}", None
+    if scenario == "create_books":
+        books = [
+            {
+                "title": f"Bench {rng.getrandbits(48):x}",
+                "author": "Benchmark",
+                "genre": "Sci-Fi",
+                "year_published": 2024,
+                "summary": synthetic_summary(rng),
+            }
+            for _ in range(args.create_batch)
+        ]
+        return "POST", "/books/bulk", {"books": books}
+    if scenario == "generate_summary":
+        # A share of requests repeats content, as clients re-requesting a summary would
+        if rng.random() < args.summary_repeat_ratio:
+            content = f"Repeated content {rng.randrange(100)}"
+        else:
+            content = f"{synthetic_summary(rng, 200)} {rng.getrandbits(64):x}"
+        return "POST", "/generate-summary/", {"content": content}
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(int(p / 100 * len(sorted_values)), len(sorted_values) - 1)]
+
+
+# Closed loop: `concurrency` clients each send their next request as soon as the last one returns
+async def run_scenario(client, scenario, concurrency, requests, catalog, args, seed):
+    remaining = iter(range(requests))
+    latencies = []
+    errors = 0
+
+    async def worker(rng):
+        nonlocal errors
+        for _ in remaining:
+            method, url, body = make_request(scenario, catalog, rng, args)
+            started_at = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started_at)
+            if response.status_code >= 400:
+                errors += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(seed + i)) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "mean_ms": 1000 * statistics.fmean(latencies),
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Regressions against a baseline run: RPS down or p99 up by more than threshold (a fraction)
+def compare(baseline, current, threshold):
+    baseline_results = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'scenario':<20} {'conc':>4}  {'rps':>10} {'change':>8}  {'p99 ms':>9} {'change':>8}")
+    for result in current["results"]:
+        before = baseline_results.get((result["scenario"], result["concurrency"]))
+        if before is None:
+            continue
+        rps_change = result["rps"] / before["rps"] - 1
+        p99_change = result["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+        regressed = rps_change < -threshold or p99_change > threshold
+        if regressed:
+            regressions.append(result)
+        print(
+            f"{result['scenario']:<20} {result['concurrency']:>4}  {result['rps']:>10.1f} {rps_change:>+8.1%}  "
+            f"{result['p99_ms']:>9.2f} {p99_change:>+8.1%}{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of the API hot paths")
+    parser.add_argument("--database-url", help="e.g. postgresql+asyncpg://postgres:pw@localhost/bench (default: throwaway SQLite)")
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--reviews-per-book", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=100, help="untimed requests before each scenario")
+    parser.add_argument("--create-batch", type=int, default=10, help="books per create_books request")
+    parser.add_argument("--summary-latency-ms", type=float, default=20.0, help="stub Llama3 response time")
+    parser.add_argument("--summary-repeat-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.20, help="allowed RPS drop / p99 rise (fraction)")
+    args = parser.parse_args()
+
+    database_url = configure_database(args.database_url)
+
+    import httpx
+    import app as books_app
+    from pagination import encode_cursor
+    from upstream import UpstreamClient
+
+    books_app.llama3_client = UpstreamClient(
+        "llama3", "http://llama3-stub", transport=stub_summarizer_transport(args.summary_latency_ms)
+    )
+    await books_app.startup()
+    try:
+        seed_started_at = time.perf_counter()
+        ids = await seed_catalog(books_app, args.books, args.reviews_per_book, seed=args.seed)
+        await books_app.load_recommendation_index()
+        print(f"catalog: {len(ids)} books, seeded and indexed in {time.perf_counter() - seed_started_at:.1f}s")
+        catalog = {"ids": ids, "encode_cursor": encode_cursor}
+
+        results = []
+        transport = httpx.ASGITransport(app=books_app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    seed = args.seed * 1000 + len(results) * 100
+                    if args.warmup:
+                        await run_scenario(client, scenario, concurrency, args.warmup, catalog, args, seed + 50)
+                    result = await run_scenario(client, scenario, concurrency, args.requests, catalog, args, seed)
+                    results.append(result)
+                    print(
+                        f"{scenario:<20} c={concurrency:<4} {result['rps']:9.1f} req/s  p50={result['p50_ms']:8.2f}ms  "
+                        f"p95={result['p95_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms  errors={result['errors']}"
+                    )
+    finally:
+        await books_app.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "database_url")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+# In-process LRU cache with a per-entry TTL. Only used from the event loop thread.
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Optional shared tier backed by Redis. Values are JSON; Redis errors degrade to a miss.
+class RedisTier:
+    def __init__(self, url, prefix, ttl=3600):
+        self.url = url
+        self.prefix = prefix
+        self.ttl = ttl
+        self._redis = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def connect(self):
+        import aioredis
+
+        if hasattr(aioredis, "from_url"):
+            self._redis = aioredis.from_url(self.url)
+        else:
+            self._redis = await aioredis.create_redis_pool(self.url)
+
+    async def close(self):
+        if self._redis is None:
+            return
+        if hasattr(self._redis, "wait_closed"):
+            self._redis.close()
+            await self._redis.wait_closed()
+        else:
+            await self._redis.close()
+        self._redis = None
+
+    async def get(self, key):
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Redis get failed: %s", e)
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key, value):
+        if self._redis is None:
+            return
+        raw = json.dumps(value)
+        try:
+            if hasattr(self._redis, "wait_closed"):
+                await self._redis.set(self.prefix + key, raw, expire=int(self.ttl))
+            else:
+                await self._redis.set(self.prefix + key, raw, ex=int(self.ttl))
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Redis set failed: %s", e)
+
+    async def delete(self, *keys):
+        if self._redis is None or not keys:
+            return
+        try:
+            await self._redis.delete(*[self.prefix + key for key in keys])
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Redis delete failed: %s", e)
+
+    def stats(self):
+        return {"connected": self._redis is not None, "hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+# Collapses concurrent calls for the same key into one. The call runs as its own task,
+# so a caller that gives up (e.g. client disconnect) does not cancel it for the others.
+class SingleFlight:
+    def __init__(self):
+        self._inflight = {}
+        self.shared = 0
+
+    async def do(self, key, fn):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+
+# Content-addressed key: whitespace-normalized text plus the generation parameters
+def summary_cache_key(content, params=None):
+    normalized = " ".join(content.split())
+    payload = json.dumps({"content": normalized, "params": params or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Summary cache: local LRU tier, optional Redis tier, and single-flight fills on a miss
+class SummaryCache:
+    def __init__(self, maxsize=1024, ttl=3600.0, redis_url=None):
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.redis = RedisTier(redis_url, prefix="summary:", ttl=ttl) if redis_url else None
+        self.single_flight = SingleFlight()
+        self.upstream_calls = 0
+
+    async def connect(self):
+        if self.redis is not None:
+            try:
+                await self.redis.connect()
+            except Exception as e:
+                logger.warning("Summary cache running without Redis: %s", e)
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+
+    # Cached value for the content, without computing it on a miss
+    async def lookup(self, content, params):
+        key = summary_cache_key(content, params)
+        value = self.local.get(key)
+        if value is None and self.redis is not None:
+            value = await self.redis.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    async def get_or_compute(self, content, params, compute):
+        key = summary_cache_key(content, params)
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        return await self.single_flight.do(key, lambda: self._fill(key, compute))
+
+    async def _fill(self, key, compute):
+        if self.redis is not None:
+            value = await self.redis.get(key)
+            if value is not None:
+                self.local.set(key, value)
+                return value
+        self.upstream_calls += 1
+        value = await compute()
+        self.local.set(key, value)
+        if self.redis is not None:
+            await self.redis.set(key, value)
+        return value
+
+    def stats(self):
+        return {
+            "local": self.local.stats(),
+            "redis": self.redis.stats() if self.redis is not None else None,
+            "single_flight_shared": self.single_flight.shared,
+            "upstream_calls": self.upstream_calls,
+        }
+
+
+# Read-through cache for entity reads: local LRU tier plus optional Redis tier.
+# invalidate() bumps a per-key generation so a read that raced with a write cannot
+# store the stale row it loaded: callers take fill_token() before reading the database.
+class ReadThroughCache:
+    def __init__(self, prefix, maxsize=10000, ttl=60.0, redis_url=None, redis_ttl=None):
+        self.prefix = prefix
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.redis = RedisTier(redis_url, prefix=prefix, ttl=redis_ttl or ttl) if redis_url else None
+        self._generations = {}
+        self._epoch = 0
+        self.invalidations = 0
+        self.stale_fills = 0
+
+    async def connect(self):
+        if self.redis is not None:
+            try:
+                await self.redis.connect()
+            except Exception as e:
+                logger.warning("%s cache running without Redis: %s", self.prefix, e)
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+
+    async def get(self, key):
+        key = str(key)
+        value = self.local.get(key)
+        if value is None and self.redis is not None:
+            value = await self.redis.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def fill_token(self, key):
+        return self._epoch, self._generations.get(str(key), 0)
+
+    async def set(self, key, value, token):
+        key = str(key)
+        if self.fill_token(key) != token:
+            self.stale_fills += 1
+            return
+        self.local.set(key, value)
+        if self.redis is not None:
+            await self.redis.set(key, value)
+
+    async def invalidate(self, *keys):
+        keys = [str(key) for key in keys]
+        for key in keys:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self.local.delete(key)
+        self.invalidations += len(keys)
+        if self.redis is not None:
+            await self.redis.delete(*keys)
+        # Generations only matter while a fill may be in flight; keep the map bounded.
+        # Bumping the epoch makes every in-flight fill stale, so clearing stays safe.
+        if len(self._generations) > 10 * self.local.maxsize:
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self):
+        return {
+            "local": self.local.stats(),
+            "redis": self.redis.stats() if self.redis is not None else None,
+            "invalidations": self.invalidations,
+            "stale_fills_skipped": self.stale_fills,
+        }
@@ -0,0 +1,389 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from metrics import RECOMMENDATION_INDEX_BUILD_DURATION
+
+
+# Dependency-free CPU embedder: hashed word unigrams and bigrams, folded into `dim` dense
+# dimensions by a fixed sparse random projection, then L2-normalized. Deterministic, so
+# vectors stay valid across restarts and workers.
+class HashingEmbedder:
+    def __init__(self, dim=256, n_features=2 ** 18, nonzeros_per_feature=4, seed=0):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, ngram_range=(1, 2), stop_words="english", norm="l2", alternate_sign=False
+        )
+        rng = np.random.default_rng(seed)
+        rows = np.repeat(np.arange(n_features), nonzeros_per_feature)
+        cols = rng.integers(0, dim, size=len(rows))
+        signs = rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=len(rows))
+        self.projection = sparse.csr_matrix((signs, (rows, cols)), shape=(n_features, dim), dtype=np.float32)
+
+    def embed(self, texts):
+        vectors = np.asarray((self.vectorizer.transform(texts) @ self.projection).todense(), dtype=np.float32)
+        return normalize(vectors)
+
+
+# Small local transformer model (e.g. all-MiniLM-L6-v2); needs the sentence-transformers package
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = model_name
+
+    def embed(self, texts):
+        vectors = self.model.encode(list(texts), batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.astype(np.float32)
+
+
+# EMBEDDING_BACKEND=hashing (default) or sentence-transformers with EMBEDDING_MODEL
+def embedder_from_env():
+    backend = os.getenv("EMBEDDING_BACKEND", "hashing")
+    if backend == "hashing":
+        return HashingEmbedder(dim=int(os.getenv("EMBEDDING_DIM", "256")))
+    if backend == "sentence-transformers":
+        return SentenceTransformerEmbedder(os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# 64-bit content hash, so unchanged summaries are not re-embedded after a restart
+def content_hash(text):
+    return int.from_bytes(hashlib.blake2b((text or "").encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# Slot-addressed float32 vectors, plus the book id and content hash of each slot. Backed by
+# NumPy memmaps when a path is given (<path>.f32, .ids, .hash and a .json header), otherwise
+# by in-memory arrays. Slots with id 0 are free. Not thread-safe; SemanticIndex locks around it.
+# One process at a time writes the files, holding an exclusive lock on <path>.lock. Any other
+# process (e.g. further API workers) starts from an in-memory copy of the files and never
+# writes them, since each process allocates slots on its own.
+class VectorStore:
+    def __init__(self, dim, embedder_name, path=None, initial_capacity=1024):
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self.path = path
+        self.vectors = self.ids = self.hashes = None
+        self._lock_file = None
+        capacity = initial_capacity
+        if path and not self._acquire(path):
+            self.path = None
+            if not self._copy(path):
+                self._open(capacity, "w+")
+        elif path and self._header_matches(path):
+            capacity = self._header(path)["capacity"]
+            self._open(capacity, "r+")
+        else:
+            self._open(capacity, "w+")
+        self.slot_by_id = {int(book_id): slot for slot, book_id in enumerate(self.ids) if book_id}
+        self.free_slots = [int(slot) for slot in np.flatnonzero(self.ids == 0)[::-1]]
+
+    def __len__(self):
+        return len(self.slot_by_id)
+
+    @property
+    def capacity(self):
+        return len(self.ids)
+
+    # Become the writer of the files at path, unless another process already is
+    def _acquire(self, path):
+        lock_file = open(f"{path}.lock", "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    @staticmethod
+    def _header(path):
+        with open(f"{path}.json") as f:
+            return json.load(f)
+
+    def _header_matches(self, path):
+        try:
+            header = self._header(path)
+        except (OSError, ValueError):
+            return False
+        return header.get("dim") == self.dim and header.get("embedder") == self.embedder_name
+
+    # Load the files at path into memory, read-only; False if there is nothing usable
+    def _copy(self, path):
+        if not self._header_matches(path):
+            return False
+        try:
+            capacity = self._header(path)["capacity"]
+            arrays = [
+                np.array(np.memmap(f"{path}{suffix}", dtype=dtype, mode="r", shape=shape))
+                for suffix, dtype, shape in (
+                    (".f32", np.float32, (capacity, self.dim)),
+                    (".ids", np.int64, (capacity,)),
+                    (".hash", np.uint64, (capacity,)),
+                )
+            ]
+        except (OSError, ValueError):
+            return False
+        self.vectors, self.ids, self.hashes = arrays
+        return True
+
+    def _open(self, capacity, mode):
+        if self.path is None:
+            self.vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+            self.ids = np.zeros(capacity, dtype=np.int64)
+            self.hashes = np.zeros(capacity, dtype=np.uint64)
+            return
+        self.vectors = np.memmap(f"{self.path}.f32", dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        self.ids = np.memmap(f"{self.path}.ids", dtype=np.int64, mode=mode, shape=(capacity,))
+        self.hashes = np.memmap(f"{self.path}.hash", dtype=np.uint64, mode=mode, shape=(capacity,))
+        with open(f"{self.path}.json", "w") as f:
+            json.dump({"dim": self.dim, "embedder": self.embedder_name, "capacity": capacity}, f)
+
+    def _grow(self):
+        old_capacity = self.capacity
+        if self.path is None:
+            old = (self.vectors, self.ids, self.hashes)
+            self._open(old_capacity * 2, "w+")
+            self.vectors[:old_capacity], self.ids[:old_capacity], self.hashes[:old_capacity] = old
+        else:
+            # Memmaps cannot be resized in place: extend the files, then map them again
+            self.flush()
+            for suffix, array in zip((".f32", ".ids", ".hash"), (self.vectors, self.ids, self.hashes)):
+                with open(f"{self.path}{suffix}", "r+b") as f:
+                    f.truncate(array.nbytes * 2)
+            self._open(old_capacity * 2, "r+")
+        self.free_slots.extend(range(self.capacity - 1, old_capacity - 1, -1))
+
+    def slot_for(self, book_id):
+        slot = self.slot_by_id.get(book_id)
+        if slot is None:
+            if not self.free_slots:
+                self._grow()
+            slot = self.free_slots.pop()
+            self.slot_by_id[book_id] = slot
+        return slot
+
+    def put(self, book_id, vector, digest):
+        slot = self.slot_for(book_id)
+        self.vectors[slot] = vector
+        self.ids[slot] = book_id
+        self.hashes[slot] = digest
+        return slot
+
+    def remove(self, book_id):
+        slot = self.slot_by_id.pop(book_id, None)
+        if slot is not None:
+            self.ids[slot] = 0
+            self.free_slots.append(slot)
+
+    def flush(self):
+        if self.path is not None:
+            for array in (self.vectors, self.ids, self.hashes):
+                array.flush()
+
+    # Flush and give up the writer lock, so another process can take over the files
+    def close(self):
+        self.flush()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+# Inverted-file ANN index: k-means centroids over the vectors, each slot filed under its
+# nearest centroid. A query scores only the slots in the nprobe closest lists.
+class IVFIndex:
+    def __init__(self, centroids, order, offsets):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, vectors, slots, nlist, iterations=10, sample_size=None, seed=0):
+        rng = np.random.default_rng(seed)
+        sample_size = sample_size or nlist * 32
+        sample = vectors[np.sort(rng.choice(slots, size=min(sample_size, len(slots)), replace=False))]
+        # Spherical k-means: the vectors are unit length, so cosine similarity is a dot product
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+
+        assignment = np.empty(len(slots), dtype=np.int64)
+        for start in range(0, len(slots), 65536):
+            chunk = vectors[slots[start:start + 65536]]
+            assignment[start:start + 65536] = np.argmax(chunk @ centroids.T, axis=1)
+        by_list = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))])
+        return cls(centroids, slots[by_list], offsets)
+
+    def candidates(self, query, nprobe):
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+
+
+# Content-based recommendation index over book summaries. Summaries are embedded once at
+# write time. Below exact_threshold books every query is an exact scan; above it an IVF index
+# serves queries, and slots written since the last build are scanned exactly on the side
+# until a background rebuild folds them in.
+class SemanticIndex:
+    def __init__(self, embedder, path=None, nprobe=8, exact_threshold=20000, max_pending=4096):
+        self.embedder = embedder
+        self.store = VectorStore(embedder.dim, embedder.name, path=path)
+        self.nprobe = nprobe
+        self.exact_threshold = exact_threshold
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._ivf = None
+        self._indexed = 0
+        self._delta = set()
+        self._rebuilding = False
+        self.ready = False
+        self.embedded = 0
+        self.rebuilds = 0
+
+    def __len__(self):
+        return len(self.store)
+
+    # Embed summaries whose content changed; books are (id, summary) pairs or objects with those
+    # fields. Bulk loads pass rebuild=False and call rebuild() once at the end.
+    def upsert_many(self, books, rebuild=True):
+        books = [(int(book.id), book.summary) if hasattr(book, "id") else (int(book[0]), book[1]) for book in books]
+        with self._lock:
+            stale = []
+            for book_id, summary in books:
+                digest = content_hash(summary)
+                slot = self.store.slot_by_id.get(book_id)
+                if slot is None or self.store.hashes[slot] != digest:
+                    stale.append((book_id, summary, digest))
+        if stale:
+            # Embedding is the expensive part, so it runs outside the lock
+            vectors = self.embedder.embed([summary or "" for _, summary, _ in stale])
+            with self._lock:
+                for (book_id, _, digest), vector in zip(stale, vectors):
+                    self._delta.add(self.store.put(book_id, vector, digest))
+                self.embedded += len(stale)
+        if rebuild and self._needs_rebuild():
+            threading.Thread(target=self.rebuild, name="semantic-index-rebuild", daemon=True).start()
+
+    def upsert(self, book):
+        self.upsert_many([book])
+
+    def remove(self, book_id):
+        with self._lock:
+            self.store.remove(book_id)
+
+    # Drop stored vectors for books that no longer exist, e.g. after loading from a stale store.
+    # Only ids up to up_to were scanned; books created since then are kept.
+    def retain(self, book_ids, up_to):
+        with self._lock:
+            for book_id in set(self.store.slot_by_id) - set(book_ids):
+                if book_id <= up_to:
+                    self.store.remove(book_id)
+
+    def _needs_rebuild(self):
+        with self._lock:
+            if self._rebuilding or len(self.store) < self.exact_threshold:
+                return False
+            return self._ivf is None or len(self._delta) >= self.max_pending
+
+    # Re-cluster every stored vector. Queries keep using the previous index meanwhile, and
+    # writes that land during the build stay in the exactly-scanned delta.
+    def rebuild(self):
+        with self._lock:
+            if self._rebuilding or len(self.store) < self.exact_threshold:
+                return
+            self._rebuilding = True
+            slots = np.array(sorted(self.store.slot_by_id.values()), dtype=np.int64)
+            vectors = self.store.vectors
+            building_delta, self._delta = self._delta, set()
+        started_at = time.perf_counter()
+        try:
+            ivf = IVFIndex.build(vectors, slots, nlist=min(4096, int(np.sqrt(len(slots)))))
+        except Exception:
+            with self._lock:
+                self._delta |= building_delta
+                self._rebuilding = False
+            raise
+        with self._lock:
+            self._ivf = ivf
+            self._indexed = len(slots)
+            self._rebuilding = False
+            self.rebuilds += 1
+        RECOMMENDATION_INDEX_BUILD_DURATION.labels("semantic").observe(time.perf_counter() - started_at)
+        self.store.flush()
+
+    # Top-n (book_ids, similarities) for the book's summary, excluding the book itself
+    def search(self, book_id, n):
+        with self._lock:
+            slot = self.store.slot_by_id.get(book_id)
+            if slot is None:
+                raise IndexError(book_id)
+            vectors, ids = self.store.vectors, self.store.ids
+            query = np.array(vectors[slot])
+            ivf, delta = self._ivf, np.fromiter(self._delta, dtype=np.int64, count=len(self._delta))
+            size = self.store.capacity
+
+        if ivf is None:
+            candidates = np.arange(size)
+        else:
+            candidates = np.concatenate([ivf.candidates(query, self.nprobe), delta])
+        # Free slots are filtered by id; a slot's vector is read once, here
+        candidates = candidates[(ids[candidates] != 0) & (candidates != slot)]
+        similarities = vectors[candidates] @ query
+        # A slot rewritten since the last build can be listed twice (its old list and the
+        # delta), so keep enough extra hits to drop the duplicates afterwards
+        keep = n if ivf is None else n + len(delta)
+        top = np.arange(len(candidates))
+        if len(candidates) > keep:
+            top = np.argpartition(-similarities, keep - 1)[:keep]
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        if ivf is not None:
+            _, first = np.unique(candidates[top], return_index=True)
+            top = top[np.sort(first)]
+        top = top[:n]
+        return ids[candidates[top]].astype(np.int64), similarities[top]
+
+    def flush(self):
+        with self._lock:
+            self.store.flush()
+
+    def close(self):
+        with self._lock:
+            self.store.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "embedder": self.embedder.name,
+                "dim": self.embedder.dim,
+                "books": len(self.store),
+                "persistent": self.store.path is not None,
+                "ann": self._ivf is not None,
+                "indexed": self._indexed,
+                "pending": len(self._delta) if self._ivf is not None else 0,
+                "nprobe": self.nprobe,
+                "embedded": self.embedded,
+                "rebuilds": self.rebuilds,
+            }
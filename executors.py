@@ -0,0 +1,117 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metrics import EXECUTOR_IN_FLIGHT, EXECUTOR_QUEUE_WAIT, EXECUTOR_RUN_DURATION
+
+
+# Raised when a pool already has max_workers + max_queue calls in flight
+class ExecutorSaturated(Exception):
+    def __init__(self, name):
+        super().__init__(f"Executor '{name}' is saturated")
+        self.name = name
+
+
+# Runs in the worker (thread or process); module level so process pools can pickle it
+def _timed_call(fn, args, kwargs):
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+# Thread or process pool with a bounded backlog, used to keep CPU-bound work off the event loop.
+# Admission is tracked on the event loop thread, so the counters need no locking.
+class BoundedExecutor:
+    def __init__(self, name, kind="thread", max_workers=None, max_queue=64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self._executor = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+        EXECUTOR_IN_FLIGHT.labels(name).set_function(lambda: self.in_flight)
+        self._queue_wait_histogram = EXECUTOR_QUEUE_WAIT.labels(name)
+        self._run_histogram = EXECUTOR_RUN_DURATION.labels(name)
+
+    # Reads <PREFIX>_POOL_KIND, <PREFIX>_POOL_WORKERS and <PREFIX>_POOL_QUEUE
+    @classmethod
+    def from_env(cls, name, prefix, kind="thread", max_workers=None, max_queue=64):
+        workers = os.getenv(f"{prefix}_POOL_WORKERS")
+        return cls(
+            name,
+            kind=os.getenv(f"{prefix}_POOL_KIND", kind),
+            max_workers=int(workers) if workers else max_workers,
+            max_queue=int(os.getenv(f"{prefix}_POOL_QUEUE", max_queue)),
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorSaturated(self.name)
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.submitted += 1
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(
+                self._get_executor(), functools.partial(_timed_call, fn, args, kwargs)
+            )
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        finished_at = time.time()
+        queue_wait = max(started_at - submitted_at, 0.0)
+        run_time = max(finished_at - started_at, 0.0)
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.run_time_total += run_time
+        self._queue_wait_histogram.observe(queue_wait)
+        self._run_histogram.observe(run_time)
+        return result
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": 1000 * self.queue_wait_total / self.completed if self.completed else 0.0,
+            "max_queue_wait_ms": 1000 * self.queue_wait_max,
+            "avg_run_ms": 1000 * self.run_time_total / self.completed if self.completed else 0.0,
+        }
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
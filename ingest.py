@@ -0,0 +1,77 @@
+import codecs
+import csv
+import json
+
+
+# Decode a stream of byte chunks into text lines, handling lines split across chunks
+async def iter_lines(byte_chunks, encoding="utf-8"):
+    # Incremental decoding so multi-byte characters split across chunks survive
+    decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ""
+    async for chunk in byte_chunks:
+        buffer += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+# Yield (line_number, record) from NDJSON; record is the exception for malformed lines
+async def iter_ndjson_records(byte_chunks):
+    line_number = 0
+    async for line in iter_lines(byte_chunks):
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Each line must be a JSON object")
+            yield line_number, record
+        except ValueError as e:
+            yield line_number, e
+
+
+# Yield (line_number, record) from CSV with a header row. Quoted fields may contain newlines:
+# lines are accumulated until the quotes balance, then parsed as one record.
+async def iter_csv_records(byte_chunks):
+    header = None
+    pending = []
+    line_number = 0
+    record_line = 0
+    async for line in iter_lines(byte_chunks):
+        line_number += 1
+        if not pending:
+            record_line = line_number
+        pending.append(line)
+        text = "\n".join(pending)
+        if text.count('"') % 2:
+            continue
+        pending = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_line, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+        else:
+            yield record_line, dict(zip(header, values))
+    if pending:
+        yield record_line, ValueError("Unterminated quoted field")
+
+
+# Group an async iterator into lists of at most size items
+async def batched(records, size):
+    batch = []
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Gathers concurrent requests into batches and runs each batch as one call on a worker thread.
+# A batch closes when it reaches max_batch_size or max_wait_ms after its first item arrived.
+# on_batch(batch_size, seconds), if given, is called from the worker thread after every model call.
+# executor, if given, is shared with other users of the same model and is not shut down by stop().
+class MicroBatcher:
+    def __init__(self, fn, max_batch_size=8, max_wait_ms=10.0, on_batch=None, executor=None):
+        self.fn = fn
+        self.on_batch = on_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = None
+        self._task = None
+        # A single thread: the model is not re-entrant and batching already uses every core
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.inference_time_total = 0.0
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def submit(self, item):
+        if self._task is None:
+            raise RuntimeError("MicroBatcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _call(self, items):
+        started_at = time.perf_counter()
+        try:
+            return self.fn(items)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.inference_time_total += elapsed
+            if self.on_batch is not None:
+                self.on_batch(len(items), elapsed)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests cancelled while queued (client went away) are dropped before inference
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            self.batches += 1
+            self.items += len(items)
+            self.largest_batch = max(self.largest_batch, len(items))
+            try:
+                results = await loop.run_in_executor(self._executor, self._call, items)
+            except Exception as e:
+                if len(items) == 1:
+                    results = [e]
+                else:
+                    # Retry one by one so a single bad input does not fail its whole batch
+                    results = [await self._run_single(loop, item) for item in items]
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def _run_single(self, loop, item):
+        try:
+            return (await loop.run_in_executor(self._executor, self._call, [item]))[0]
+        except Exception as e:
+            return e
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "largest_batch": self.largest_batch,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "avg_inference_ms": 1000 * self.inference_time_total / self.batches if self.batches else 0.0,
+        }
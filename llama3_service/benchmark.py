@@ -0,0 +1,83 @@
+# Local load generator for the summarization service.
+# Uses a tiny stand-in model so it runs in seconds on a laptop CPU:
+#
+#     python benchmark.py --requests 64 --concurrency 16 --batch-sizes 1 4 8
+#
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SUMMARIZER_MODEL", "sshleifer/bart-tiny-random")
+
+import httpx
+import llama3
+from batching import MicroBatcher
+
+SAMPLE_TEXT = (
+    "The novel follows a young engineer who leaves her coastal town to work on a remote research station. "
+    "Over one long winter she uncovers the station's history, forms uneasy alliances with the crew, "
+    "and has to decide whether the discovery she makes should ever be reported home."
+)
+
+
+async def run_load(max_batch_size, max_wait_ms, requests, concurrency):
+    llama3.batcher = MicroBatcher(llama3.summarize_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    await llama3.batcher.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request(client, i):
+        async with semaphore:
+            started_at = time.perf_counter()
+            response = await client.post("/generate-summary/", json={"content": f"{SAMPLE_TEXT} ({i})"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started_at)
+
+    transport = httpx.ASGITransport(app=llama3.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        # Warm up outside the timed window
+        await one_request(client, -1)
+        latencies.clear()
+        started_at = time.perf_counter()
+        await asyncio.gather(*(one_request(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - started_at
+
+    stats = llama3.batcher.stats()
+    await llama3.batcher.stop()
+    latencies.sort()
+    return {
+        "max_batch_size": max_batch_size,
+        "summaries_per_sec": requests / elapsed,
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+        "avg_batch_size": stats["avg_batch_size"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Summaries/sec with and without micro-batching")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Load and warm up the model before timing anything
+    llama3.model.start()
+    await asyncio.to_thread(llama3.model.ready.wait)
+    if llama3.model.error:
+        raise SystemExit(f"Model failed to load: {llama3.model.error}")
+    print(f"model={llama3.SUMMARIZER_MODEL} requests={args.requests} concurrency={args.concurrency}")
+    for max_batch_size in args.batch_sizes:
+        result = await run_load(max_batch_size, args.max_wait_ms, args.requests, args.concurrency)
+        print(
+            f"batch<={result['max_batch_size']:>3}  {result['summaries_per_sec']:8.2f} summaries/s  "
+            f"p50={result['p50_ms']:8.1f}ms  p95={result['p95_ms']:8.1f}ms  "
+            f"avg batch={result['avg_batch_size']:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
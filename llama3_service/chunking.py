@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+
+# Start/end offsets of overlapping windows of at most chunk_tokens tokens
+def token_windows(n_tokens, chunk_tokens, overlap_tokens):
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+    if n_tokens <= chunk_tokens:
+        return [(0, n_tokens)]
+    step = chunk_tokens - overlap_tokens
+    windows = []
+    start = 0
+    while True:
+        end = min(start + chunk_tokens, n_tokens)
+        windows.append((start, end))
+        if end == n_tokens:
+            return windows
+        start += step
+
+
+# Split text into token-budgeted, overlapping chunks
+def chunk_text(tokenizer, text, chunk_tokens, overlap_tokens):
+    token_ids = tokenizer.encode(text, add_special_tokens=False)
+    return [
+        tokenizer.decode(token_ids[start:end], skip_special_tokens=True, clean_up_tokenization_spaces=False)
+        for start, end in token_windows(len(token_ids), chunk_tokens, overlap_tokens)
+    ]
+
+
+# Longest chunk the model reads whole: its window minus the special tokens added around the input.
+# Anything longer would be cut by truncation=True, silently dropping text.
+def max_chunk_tokens(tokenizer):
+    return tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+
+
+# Map-reduce summarization for inputs longer than the model's context window.
+# map: summarize every chunk (submitted together so they run as batches);
+# reduce: summarize the joined partial summaries, re-chunking up to max_depth times.
+# Tokenization runs on executor, which should be the model's own thread: a fast tokenizer is not
+# safe to use from two threads at once.
+class LongDocumentSummarizer:
+    def __init__(self, tokenizer, summarize_chunk, summarize_final, chunk_tokens=900, overlap_tokens=100, max_depth=3,
+                 executor=None):
+        self.tokenizer = tokenizer
+        self.executor = executor
+        self.summarize_chunk = summarize_chunk
+        self.summarize_final = summarize_final
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.max_depth = max_depth
+
+    async def summarize(self, text, chunk_tokens=None, overlap_tokens=None, max_depth=None):
+        chunk_tokens = chunk_tokens or self.chunk_tokens
+        overlap_tokens = self.overlap_tokens if overlap_tokens is None else overlap_tokens
+        max_depth = self.max_depth if max_depth is None else max_depth
+        limit = max_chunk_tokens(self.tokenizer)
+        if chunk_tokens > limit:
+            raise ValueError(f"chunk_tokens must be at most {limit} for this model")
+        loop = asyncio.get_running_loop()
+        stages = []
+        depth = 0
+
+        while True:
+            started_at = time.perf_counter()
+            chunks = await loop.run_in_executor(
+                self.executor, chunk_text, self.tokenizer, text, chunk_tokens, overlap_tokens
+            )
+            stages.append({"stage": "chunk", "depth": depth, "chunks": len(chunks), "seconds": time.perf_counter() - started_at})
+
+            # Fits in one window, or out of depth (the summarizer then truncates to its window)
+            if len(chunks) == 1 or depth >= max_depth:
+                started_at = time.perf_counter()
+                summary = await self.summarize_final(text)
+                stages.append({"stage": "reduce", "depth": depth, "chunks": 1, "seconds": time.perf_counter() - started_at})
+                return {"summary": summary, "stages": stages}
+
+            started_at = time.perf_counter()
+            partial_summaries = await asyncio.gather(*(self.summarize_chunk(chunk) for chunk in chunks))
+            stages.append({"stage": "map", "depth": depth, "chunks": len(chunks), "seconds": time.perf_counter() - started_at})
+            text = "\n".join(partial_summaries)
+            depth += 1
@@ -1,6 +1,17 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from transformers import pipeline
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel, Field, root_validator
+from batching import MicroBatcher
+from streaming import SummaryStreamer
+from chunking import LongDocumentSummarizer
+from model import ModelLoader, ModelNotReady, load_summarizer
+from metrics import (
+    PrometheusMiddleware, SUMMARIZER_INFERENCE_DURATION, SUMMARIZER_QUEUE_DEPTH, batch_observer, record_model_state,
+)
+from typing import Optional
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 
@@ -8,29 +19,219 @@ warnings.filterwarnings("ignore", category=FutureWarning)
 # FastAPI app instance with debugging enabled
 app = FastAPI(debug=True)
 
-# Load the summarization pipeline from Hugging Face's transformers library
-summarizer = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6")
+# Per-route request counts, latency histograms and in-flight requests, served at /metrics
+app.add_middleware(PrometheusMiddleware)
+
+# Summarization model: a Hugging Face model name, or a local directory written by prepare_model.py.
+# SUMMARIZER_CACHE_DIR overrides the Hugging Face cache; SUMMARIZER_LOCAL_ONLY=1 never downloads.
+SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6")
+SUMMARIZER_CACHE_DIR = os.getenv("SUMMARIZER_CACHE_DIR") or None
+SUMMARIZER_LOCAL_ONLY = os.getenv("SUMMARIZER_LOCAL_ONLY", "0") == "1"
+# Inference backend: "pytorch" (fp32), "int8" (dynamically quantized PyTorch) or "onnx" (ONNX Runtime)
+SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "pytorch")
+# Torch threads; set it when several containers share a host so they do not oversubscribe the CPU
+SUMMARIZER_TORCH_THREADS = int(os.getenv("SUMMARIZER_TORCH_THREADS", "0")) or None
+# ONNX Runtime thread pools (0: ONNX Runtime default)
+SUMMARIZER_ORT_INTRA_OP_THREADS = int(os.getenv("SUMMARIZER_ORT_INTRA_OP_THREADS", "0"))
+SUMMARIZER_ORT_INTER_OP_THREADS = int(os.getenv("SUMMARIZER_ORT_INTER_OP_THREADS", "0"))
+# Inputs in the warm-up batch run before the service reports ready; 0 skips warm-up
+SUMMARIZER_WARMUP_BATCH_SIZE = int(os.getenv("SUMMARIZER_WARMUP_BATCH_SIZE", "1"))
+WARMUP_TEXT = (
+    "The library opened a new reading room this spring. Visitors can borrow books, attend author talks, "
+    "and join weekly discussion groups about classic and contemporary novels."
+)
+
+# Generation settings shared by every request, so concurrent requests can run as one batch
+SUMMARY_KWARGS = {
+    "max_length": 450,
+    "min_length": 40,
+    "do_sample": False,
+    "truncation": True,  # Over-long input is cut to the model window; use /generate-summary/long instead
+    "clean_up_tokenization_spaces": False,  # Avoid future warnings
+}
+
+# Shorter partial summaries for the map step of long-document summarization
+CHUNK_SUMMARY_KWARGS = dict(SUMMARY_KWARGS, max_length=int(os.getenv("SUMMARY_CHUNK_MAX_LENGTH", "150")), min_length=20)
+
+# Run a whole batch of texts through the summarizer in one pipeline call
+def make_batch_summarizer(summary_kwargs):
+    def summarize(texts):
+        summaries = model.get()(texts, batch_size=len(texts), **summary_kwargs)
+        return [summary['summary_text'] for summary in summaries]
+    return summarize
+
+summarize_batch = make_batch_summarizer(SUMMARY_KWARGS)
+
+# The one thread that runs the model and its tokenizer. Neither is safe to call from two threads at
+# once (the fast tokenizer raises "Already borrowed"), and one model call already uses every core.
+model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+
+# Micro-batching queues in front of the model (SUMMARY_MAX_BATCH_SIZE, SUMMARY_MAX_WAIT_MS)
+batcher = MicroBatcher(
+    summarize_batch,
+    max_batch_size=int(os.getenv("SUMMARY_MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("SUMMARY_MAX_WAIT_MS", "10")),
+    on_batch=batch_observer("summary"),
+    executor=model_executor,
+)
+chunk_batcher = MicroBatcher(
+    make_batch_summarizer(CHUNK_SUMMARY_KWARGS),
+    max_batch_size=int(os.getenv("SUMMARY_MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("SUMMARY_MAX_WAIT_MS", "10")),
+    on_batch=batch_observer("chunks"),
+    executor=model_executor,
+)
+SUMMARIZER_QUEUE_DEPTH.labels("summary").set_function(lambda: batcher.stats()["queued"])
+SUMMARIZER_QUEUE_DEPTH.labels("chunks").set_function(lambda: chunk_batcher.stats()["queued"])
+
+# Map-reduce summarizer for content longer than the model window
+# (SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_OVERLAP, SUMMARY_MAX_DEPTH)
+long_summarizer = LongDocumentSummarizer(
+    None,  # Set once the model has loaded
+    summarize_chunk=lambda text: chunk_batcher.submit(text),
+    summarize_final=lambda text: batcher.submit(text),
+    chunk_tokens=int(os.getenv("SUMMARY_CHUNK_TOKENS", "900")),
+    overlap_tokens=int(os.getenv("SUMMARY_CHUNK_OVERLAP", "100")),
+    max_depth=int(os.getenv("SUMMARY_MAX_DEPTH", "3")),
+    executor=model_executor,
+)
+
+# Token-by-token generation for streaming requests. It runs on the model thread, so a stream
+# holds the model for its whole generation and queued batches wait until it finishes.
+streamer = SummaryStreamer(
+    None,  # Set once the model has loaded
+    {key: SUMMARY_KWARGS[key] for key in ("max_length", "min_length", "do_sample")},
+    executor=model_executor,
+    on_generate=SUMMARIZER_INFERENCE_DURATION.labels("stream").observe,
+)
+
+def load_model():
+    summarizer = load_summarizer(
+        SUMMARIZER_MODEL,
+        backend=SUMMARIZER_BACKEND,
+        cache_dir=SUMMARIZER_CACHE_DIR,
+        local_files_only=SUMMARIZER_LOCAL_ONLY,
+        torch_threads=SUMMARIZER_TORCH_THREADS,
+        intra_op_threads=SUMMARIZER_ORT_INTRA_OP_THREADS,
+        inter_op_threads=SUMMARIZER_ORT_INTER_OP_THREADS,
+    )
+    long_summarizer.tokenizer = summarizer.tokenizer
+    streamer.summarizer = summarizer
+    return summarizer
+
+# One batch through the same code path requests take, so kernels and the tokenizer are initialized
+def warm_up(summarizer):
+    if SUMMARIZER_WARMUP_BATCH_SIZE > 0:
+        texts = [WARMUP_TEXT] * SUMMARIZER_WARMUP_BATCH_SIZE
+        summarizer(texts, batch_size=len(texts), **SUMMARY_KWARGS)
+
+# Loaded in the background after the server has bound; see /healthz and /readyz
+model = ModelLoader(load_model, warm_up=warm_up, on_state=record_model_state)
+
+# Summary endpoints answer 503 until the model is ready, rather than queueing behind the load
+def require_model():
+    try:
+        model.get()
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+@app.on_event("startup")
+async def startup():
+    model.start()
+    await batcher.start()
+    await chunk_batcher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await batcher.stop()
+    await chunk_batcher.stop()
+    streamer.shutdown()
+    model_executor.shutdown(wait=False)
 
 # Pydantic model for input
 class SummaryRequest(BaseModel):
     content: str
 
+# Pydantic model for long-document input; unset fields use the service defaults.
+# chunk_tokens is also capped by the model window once the tokenizer is loaded (422 beyond it).
+class LongSummaryRequest(BaseModel):
+    content: str
+    chunk_tokens: Optional[int] = Field(None, ge=32, le=4096)
+    overlap_tokens: Optional[int] = Field(None, ge=0, le=2048)
+    max_depth: Optional[int] = Field(None, ge=0, le=5)
+
+    # Windows must advance, including when only one of the two is given
+    @root_validator(skip_on_failure=True)
+    def check_overlap(cls, values):
+        chunk_tokens = values.get("chunk_tokens") or long_summarizer.chunk_tokens
+        overlap_tokens = values.get("overlap_tokens")
+        if overlap_tokens is None:
+            overlap_tokens = long_summarizer.overlap_tokens
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        return values
+
 # Endpoint to generate a summary
 @app.post("/generate-summary/")
 async def generate_summary(request: SummaryRequest):
+    require_model()
+    try:
+        # Queue the content; it is summarized together with other concurrent requests
+        summary = await batcher.submit(request.content)
+        return {"summary": summary}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
+
+# Stream the summary as server-sent events while it is being generated
+@app.post("/generate-summary/stream")
+async def generate_summary_stream(request: SummaryRequest):
+    require_model()
+    return StreamingResponse(
+        streamer.stream(request.content),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Summarize content of any length with chunked map-reduce; reports per-stage timings
+@app.post("/generate-summary/long")
+async def generate_long_summary(request: LongSummaryRequest):
+    require_model()
     try:
-        # Use the summarizer model to generate a summary
-        summary = summarizer(
+        return await long_summarizer.summarize(
             request.content,
-            max_length=450,
-            min_length=40,
-            do_sample=False,
-            clean_up_tokenization_spaces=False  # Avoid future warnings
+            chunk_tokens=request.chunk_tokens,
+            overlap_tokens=request.overlap_tokens,
+            max_depth=request.max_depth,
         )
-        return {"summary": summary[0]['summary_text']}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
+# Liveness: the process is serving requests; fails only if the model could not be loaded
+@app.get("/healthz")
+async def healthz():
+    status_code = 500 if model.state == "failed" else 200
+    return JSONResponse(model.status(), status_code=status_code)
+
+# Readiness: the model is loaded and warmed up
+@app.get("/readyz")
+async def readyz():
+    status_code = 200 if model.ready.is_set() else 503
+    return JSONResponse(model.status(), status_code=status_code)
+
+# Batching statistics
+@app.get("/stats/batching")
+async def get_batching_stats():
+    return {"summary": batcher.stats(), "chunks": chunk_batcher.stats()}
+
+# Prometheus metrics
+@app.get("/metrics")
+async def get_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
+    # One process per container: readiness and metrics are per process, so scale out with more
+    # containers (each probed and scraped on its own) rather than uvicorn workers
     uvicorn.run(app, host="0.0.0.0", port=9000)
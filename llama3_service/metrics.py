@@ -0,0 +1,96 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Latency buckets in seconds; generation on CPU can take tens of seconds for long inputs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# HTTP
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+# Summarizer; queue is "summary", "chunks" (long-document map step) or "stream"
+SUMMARIZER_BATCH_SIZE = Histogram(
+    "summarizer_batch_size",
+    "Inputs per model call",
+    ["queue"],
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+SUMMARIZER_INFERENCE_DURATION = Histogram(
+    "summarizer_inference_seconds",
+    "Model time per call (one batch, or one streamed generation)",
+    ["queue"],
+    buckets=LATENCY_BUCKETS,
+)
+SUMMARIZER_QUEUE_DEPTH = Gauge("summarizer_queue_depth", "Inputs waiting for the model", ["queue"])
+SUMMARIZER_MODEL_READY = Gauge("summarizer_model_ready", "1 once the model is loaded and warmed up")
+SUMMARIZER_STARTUP_DURATION = Gauge(
+    "summarizer_startup_seconds",
+    "Time spent loading and warming up the model",
+    ["stage"],
+)
+
+
+# Callback for ModelLoader(on_state=...)
+def record_model_state(state, timings):
+    SUMMARIZER_MODEL_READY.set(1 if state == "ready" else 0)
+    for stage, seconds in timings.items():
+        SUMMARIZER_STARTUP_DURATION.labels(stage.replace("_seconds", "")).set(seconds)
+
+
+# Callback for MicroBatcher(on_batch=...): records batch size and inference time for a queue
+def batch_observer(queue):
+    batch_size = SUMMARIZER_BATCH_SIZE.labels(queue)
+    inference = SUMMARIZER_INFERENCE_DURATION.labels(queue)
+
+    def observe(size, seconds):
+        batch_size.observe(size)
+        inference.observe(seconds)
+    return observe
+
+
+# Pure ASGI middleware recording per-route request counts, latency and in-flight requests.
+# Routes are labelled by their template, so label cardinality stays bounded.
+class PrometheusMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._durations = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched")
+            # Cache the labelled children: labels() takes a lock on every call
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations[key] = HTTP_REQUEST_DURATION.labels(*key)
+            duration.observe(elapsed)
+            HTTP_REQUESTS.labels(*key, status_code).inc()
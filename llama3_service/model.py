@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+
+
+class ModelNotReady(Exception):
+    def __init__(self, state):
+        super().__init__(f"Model is {state}")
+        self.state = state
+
+
+BACKENDS = ("pytorch", "int8", "onnx")
+
+
+# Build the summarization pipeline from a local directory or cache, on one of the backends:
+# "pytorch": fp32 weights, loaded from safetensors with low_cpu_mem_usage to avoid an extra copy
+#   during loading.
+# "int8": PyTorch with Linear layers dynamically quantized to int8. Smaller and faster on CPU;
+#   the fp32 model is loaded first, so peak memory during loading is that of fp32.
+# "onnx": ONNX Runtime (needs optimum[onnxruntime]). model_name should be a directory exported
+#   by prepare_model.py --backend onnx; anything else is exported on load, which is slow.
+def load_summarizer(model_name, backend="pytorch", cache_dir=None, local_files_only=False, torch_threads=None,
+                    intra_op_threads=None, inter_op_threads=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown summarizer backend: {backend}")
+    from transformers import AutoTokenizer, pipeline
+
+    if torch_threads:
+        import torch
+        torch.set_num_threads(torch_threads)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir, local_files_only=local_files_only)
+    if backend == "onnx":
+        model = load_onnx_model(model_name, cache_dir, local_files_only, intra_op_threads, inter_op_threads)
+    else:
+        from transformers import AutoModelForSeq2SeqLM
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            model_name,
+            cache_dir=cache_dir,
+            local_files_only=local_files_only,
+            low_cpu_mem_usage=True,
+        )
+        model.eval()
+        if backend == "int8":
+            import torch
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+def is_onnx_export(directory):
+    return os.path.isdir(directory) and any(name.endswith(".onnx") for name in os.listdir(directory))
+
+
+# ONNX Runtime encoder/decoder sessions with explicit thread counts (0 lets ONNX Runtime decide)
+def load_onnx_model(model_name, cache_dir=None, local_files_only=False, intra_op_threads=None, inter_op_threads=None):
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.intra_op_num_threads = intra_op_threads or 0
+    session_options.inter_op_num_threads = inter_op_threads or 0
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        model_name,
+        export=not is_onnx_export(model_name),
+        cache_dir=cache_dir,
+        local_files_only=local_files_only,
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+    )
+
+
+# Save a model in `directory` so it loads offline: safetensors for the PyTorch backends
+# (memory-mapped on load), or an exported ONNX graph for the onnx backend
+def export_summarizer(model_name, directory, backend="pytorch", cache_dir=None):
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    os.makedirs(directory, exist_ok=True)
+    AutoTokenizer.from_pretrained(model_name, cache_dir=cache_dir).save_pretrained(directory)
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, cache_dir=cache_dir).save_pretrained(directory)
+    else:
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name, cache_dir=cache_dir)
+        model.save_pretrained(directory, safe_serialization=True)
+
+
+# Loads the model on a background thread so the server binds and answers probes immediately.
+# load() returns the pipeline; warm_up(pipeline), if given, runs before the model is reported
+# ready so the first real request does not pay one-time initialization costs.
+# state goes "starting" -> "loading" -> "warming" -> "ready", or to "failed".
+class ModelLoader:
+    def __init__(self, load, warm_up=None, on_state=None):
+        self._load = load
+        self._warm_up = warm_up
+        self._on_state = on_state
+        self._thread = None
+        self.pipeline = None
+        self.error = None
+        self.timings = {}
+        self.state = "starting"
+        self.ready = threading.Event()
+
+    def _set_state(self, state):
+        self.state = state
+        if self._on_state is not None:
+            self._on_state(state, self.timings)
+
+    def _run(self):
+        try:
+            self._set_state("loading")
+            started_at = time.perf_counter()
+            self.pipeline = self._load()
+            self.timings["load_seconds"] = time.perf_counter() - started_at
+            if self._warm_up is not None:
+                self._set_state("warming")
+                started_at = time.perf_counter()
+                self._warm_up(self.pipeline)
+                self.timings["warmup_seconds"] = time.perf_counter() - started_at
+            self._set_state("ready")
+            self.ready.set()
+        except Exception as e:
+            self.error = str(e)
+            self._set_state("failed")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+            self._thread.start()
+
+    # The loaded pipeline; raises ModelNotReady until loading and warm-up have finished
+    def get(self):
+        if not self.ready.is_set():
+            raise ModelNotReady(self.state)
+        return self.pipeline
+
+    def status(self):
+        status = {"state": self.state, **self.timings}
+        if self.error is not None:
+            status["error"] = self.error
+        return status
@@ -0,0 +1,198 @@
+# Output parity, latency and memory of the summarizer backends on a fixed corpus.
+# Each backend runs in its own process so peak memory is measured per backend:
+#
+#     python parity.py --model /models/summarizer --backends pytorch int8
+#     python parity.py --model /models/summarizer --onnx-model /models/summarizer-onnx --backends pytorch int8 onnx
+#
+# Memory is reported as resident memory after loading and as the process peak. The peak includes
+# load-time copies (for int8, the fp32 model loaded before quantization), so compare backends on
+# the resident figure.
+#
+# Summaries are compared with those of the first backend (exact matches and word-overlap F1);
+# exits non-zero if any backend's mean F1 falls below --min-f1.
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import statistics
+import sys
+import time
+from collections import Counter
+
+CORPUS = [
+    "The novel follows a young engineer who leaves her coastal town to work on a remote research station. "
+    "Over one long winter she uncovers the station's history, forms uneasy alliances with the crew, "
+    "and has to decide whether the discovery she makes should ever be reported home.",
+    "Set in a crumbling empire, the story tracks three siblings who inherit their father's trading company "
+    "just as the old trade routes collapse. Each of them bets the family fortune on a different future, "
+    "and their rivalry slowly turns into a war that reshapes the capital.",
+    "A retired detective is drawn back into an unsolved case when a letter arrives from a man who has been "
+    "dead for twenty years. The investigation leads her through the archives of a small mountain town, "
+    "where nearly everyone has a reason to keep the past buried.",
+    "This history of the printing press explains how movable type spread across Europe in the fifteenth "
+    "century, how it changed the economics of books, and how it fed religious reform, scientific exchange "
+    "and the rise of vernacular literature.",
+    "Two friends set out to walk the length of a river from its source to the sea. Along the way they meet "
+    "farmers, ferrymen and fishermen whose lives depend on the water, and the journey becomes a meditation "
+    "on friendship, memory and the slow changes of the landscape.",
+    "A practical guide to building reliable software systems, covering how to design for failure, measure "
+    "what matters, run safe deployments, and organize teams so that on-call work stays sustainable as the "
+    "system and the company grow.",
+    "When a colony ship wakes its passengers two centuries early, the crew must work out what went wrong "
+    "before supplies run out. The captain suspects sabotage, the engineers suspect the ship itself, "
+    "and the passengers begin to suspect the crew.",
+    "A cookbook and memoir in one, this book tells the story of a family restaurant through the recipes that "
+    "kept it open across three generations, from the grandmother's first stall at the market to the "
+    "granddaughter's decision to close it.",
+]
+
+SUMMARY_KWARGS = {"max_length": 120, "min_length": 20, "do_sample": False, "truncation": True}
+
+
+def word_f1(reference, candidate):
+    reference_words = Counter(reference.lower().split())
+    candidate_words = Counter(candidate.lower().split())
+    overlap = sum((reference_words & candidate_words).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(candidate_words.values())
+    recall = overlap / sum(reference_words.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+# Resident memory right now, from /proc/self/statm (Linux); None where it is not available
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Runs in a child process: load one backend, summarize the corpus one text at a time, then as one batch
+def measure_backend(backend, model_name, args, results):
+    try:
+        from model import load_summarizer
+
+        started_at = time.perf_counter()
+        summarizer = load_summarizer(
+            model_name,
+            backend=backend,
+            torch_threads=args.torch_threads,
+            intra_op_threads=args.intra_op_threads,
+            inter_op_threads=args.inter_op_threads,
+        )
+        load_seconds = time.perf_counter() - started_at
+        # Release what loading left behind (e.g. the fp32 weights int8 was quantized from)
+        gc.collect()
+        rss_after_load = current_rss_mb()
+        peak_after_load = peak_rss_mb()
+
+        summarizer(CORPUS[:1], **SUMMARY_KWARGS)  # warm-up
+        summaries = []
+        latencies = []
+        for _ in range(args.repeat):
+            summaries = []
+            for text in CORPUS:
+                started_at = time.perf_counter()
+                summaries.append(summarizer([text], **SUMMARY_KWARGS)[0]["summary_text"])
+                latencies.append(time.perf_counter() - started_at)
+        started_at = time.perf_counter()
+        summarizer(CORPUS, batch_size=len(CORPUS), **SUMMARY_KWARGS)
+        batch_seconds = time.perf_counter() - started_at
+
+        latencies.sort()
+        results.put({
+            "backend": backend,
+            "model": model_name,
+            "load_seconds": load_seconds,
+            "p50_ms": 1000 * statistics.median(latencies),
+            "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+            "batch_ms": 1000 * batch_seconds,
+            "rss_after_load_mb": rss_after_load,
+            "peak_rss_after_load_mb": peak_after_load,
+            "peak_rss_mb": peak_rss_mb(),
+            "summaries": summaries,
+        })
+    except Exception as e:
+        results.put({"backend": backend, "model": model_name, "error": str(e)})
+
+
+def compare(reference, result):
+    pairs = list(zip(reference["summaries"], result["summaries"]))
+    result["exact_matches"] = sum(a == b for a, b in pairs)
+    result["mean_f1"] = statistics.fmean(word_f1(a, b) for a, b in pairs)
+    result["min_f1"] = min(word_f1(a, b) for a, b in pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare summarizer backends for output parity, latency and memory")
+    parser.add_argument("--model", default=os.getenv("SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6"))
+    parser.add_argument("--onnx-model", help="directory from prepare_model.py --backend onnx (default: export --model)")
+    parser.add_argument("--backends", nargs="+", choices=["pytorch", "int8", "onnx"], default=["pytorch", "int8", "onnx"])
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus for latency")
+    parser.add_argument("--torch-threads", type=int)
+    parser.add_argument("--intra-op-threads", type=int, default=0)
+    parser.add_argument("--inter-op-threads", type=int, default=0)
+    parser.add_argument("--min-f1", type=float, default=0.8)
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    reports = []
+    for backend in args.backends:
+        model_name = args.onnx_model if backend == "onnx" and args.onnx_model else args.model
+        results = context.Queue()
+        process = context.Process(target=measure_backend, args=(backend, model_name, args, results))
+        process.start()
+        while True:
+            try:
+                report = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    report = {"backend": backend, "model": model_name, "error": f"exited with code {process.exitcode}"}
+                    break
+        process.join()
+        reports.append(report)
+
+    measured = [report for report in reports if "error" not in report]
+    if measured:
+        for report in measured:
+            compare(measured[0], report)
+
+    print(f"{'backend':<8} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'batch ms':>9} {'RSS MB':>7} {'peak MB':>8} {'exact':>6} {'F1':>6}")
+    failed = False
+    for report in reports:
+        if "error" in report:
+            print(f"{report['backend']:<8} error: {report['error']}")
+            failed = True
+            continue
+        below = report["mean_f1"] < args.min_f1
+        failed = failed or below
+        rss = f"{report['rss_after_load_mb']:7.0f}" if report["rss_after_load_mb"] is not None else f"{'n/a':>7}"
+        print(
+            f"{report['backend']:<8} {report['load_seconds']:7.1f} {report['p50_ms']:8.1f} {report['p95_ms']:8.1f} "
+            f"{report['batch_ms']:9.1f} {rss} {report['peak_rss_mb']:8.0f} {report['exact_matches']:>3}/{len(CORPUS):<2} "
+            f"{report['mean_f1']:6.3f}{'  BELOW --min-f1' if below else ''}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"reference": measured[0]["backend"] if measured else None, "results": reports}, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
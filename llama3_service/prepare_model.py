@@ -0,0 +1,29 @@
+# Download the summarization model once and save it as safetensors in a local directory.
+# Point SUMMARIZER_MODEL at that directory (with SUMMARIZER_LOCAL_ONLY=1) so the service loads
+# offline and without converting the checkpoint on every start:
+#
+#     python prepare_model.py --output /models/summarizer
+#     python prepare_model.py --backend onnx --output /models/summarizer-onnx   # for SUMMARIZER_BACKEND=onnx
+#
+import argparse
+import os
+import time
+
+from model import export_summarizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save the summarization model for offline, memory-mapped loading")
+    parser.add_argument("--model", default=os.getenv("SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6"))
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--backend", choices=["pytorch", "onnx"], default="pytorch", help="int8 loads the pytorch export")
+    parser.add_argument("--cache-dir", default=os.getenv("SUMMARIZER_CACHE_DIR"))
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    export_summarizer(args.model, args.output, backend=args.backend, cache_dir=args.cache_dir)
+    print(f"saved {args.model} to {args.output} in {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
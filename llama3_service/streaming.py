@@ -0,0 +1,96 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from transformers import StoppingCriteria, StoppingCriteriaList, TextStreamer
+
+
+# Streamer that hands decoded text from the generation thread to an asyncio queue
+class AsyncTextStreamer(TextStreamer):
+    def __init__(self, tokenizer, loop, **decode_kwargs):
+        # skip_prompt drops the decoder start token that generate() feeds in first
+        super().__init__(tokenizer, skip_prompt=True, **decode_kwargs)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def on_finalized_text(self, text, stream_end=False):
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+        if stream_end:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+
+# Stops generation once the client has gone away
+class CancelledCriteria(StoppingCriteria):
+    def __init__(self, cancelled):
+        self.cancelled = cancelled
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.cancelled.is_set()
+
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+# Runs generate() for one input on a worker thread and yields server-sent events as text is
+# decoded: a "data" event per chunk of text, then an "end" event with the full summary.
+# executor should be the model's own thread, shared with the batchers: the model and its fast
+# tokenizer are not safe to use from two threads, so streams take turns with batches.
+# on_generate(seconds), if given, is called from the worker thread after every generation.
+class SummaryStreamer:
+    def __init__(self, summarizer, generate_kwargs, executor=None, on_generate=None):
+        self.summarizer = summarizer
+        self.generate_kwargs = generate_kwargs
+        self.on_generate = on_generate
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary-stream")
+
+    def _generate(self, content, streamer, cancelled):
+        started_at = time.perf_counter()
+        try:
+            tokenizer = self.summarizer.tokenizer
+            inputs = tokenizer(content, return_tensors="pt", truncation=True)
+            self.summarizer.model.generate(
+                **inputs,
+                streamer=streamer,
+                stopping_criteria=StoppingCriteriaList([CancelledCriteria(cancelled)]),
+                # Streamers only support a single hypothesis, so streaming decodes greedily
+                num_beams=1,
+                **self.generate_kwargs,
+            )
+        finally:
+            # Always unblock the reader, including when generate() raised before streaming
+            streamer.loop.call_soon_threadsafe(streamer.queue.put_nowait, None)
+            if self.on_generate is not None:
+                self.on_generate(time.perf_counter() - started_at)
+
+    async def stream(self, content):
+        loop = asyncio.get_running_loop()
+        streamer = AsyncTextStreamer(
+            self.summarizer.tokenizer, loop, skip_special_tokens=True, clean_up_tokenization_spaces=False
+        )
+        cancelled = threading.Event()
+        generation = loop.run_in_executor(self._executor, self._generate, content, streamer, cancelled)
+        chunks = []
+        try:
+            while True:
+                text = await streamer.queue.get()
+                if text is None:
+                    break
+                chunks.append(text)
+                yield sse_event({"text": text})
+            await generation
+            yield sse_event({"summary": "".join(chunks).strip()}, event="end")
+        except Exception as e:
+            yield sse_event({"detail": f"Error generating summary: {str(e)}"}, event="error")
+        finally:
+            # Stops generation early if the client disconnected mid-stream
+            cancelled.set()
+
+    def shutdown(self):
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,110 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Latency buckets in seconds, from sub-millisecond cache/index work up to slow upstream calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Background rebuilds run from milliseconds (small catalogs) to minutes (millions of books)
+BUILD_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# HTTP
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+# Database
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["role"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database statement execution time",
+    ["role"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Upstream services (the Llama3 summarizer)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Upstream calls including retries; for streams, the time until response headers arrive",
+    ["upstream", "path", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_IN_FLIGHT = Gauge("upstream_requests_in_flight", "Upstream calls currently in progress", ["upstream"])
+
+# Worker pools
+EXECUTOR_QUEUE_WAIT = Histogram(
+    "executor_queue_wait_seconds",
+    "Time a task waited for a worker",
+    ["pool"],
+    buckets=LATENCY_BUCKETS,
+)
+EXECUTOR_RUN_DURATION = Histogram(
+    "executor_run_duration_seconds",
+    "Time a task ran on a worker",
+    ["pool"],
+    buckets=LATENCY_BUCKETS,
+)
+EXECUTOR_IN_FLIGHT = Gauge("executor_tasks_in_flight", "Tasks queued or running in a worker pool", ["pool"])
+
+# Recommendation indexes
+RECOMMENDATION_INDEX_BUILD_DURATION = Histogram(
+    "recommendation_index_build_seconds",
+    "Time to build a recommendation index snapshot",
+    ["index"],
+    buckets=BUILD_BUCKETS,
+)
+
+# Background summary jobs; outcome is "done", "failed" or "retried"
+SUMMARY_JOB_ITEMS = Counter("summary_job_items_total", "Summary job items processed", ["outcome"])
+
+
+# Pure ASGI middleware recording per-route request counts, latency and in-flight requests.
+# Routes are labelled by their template (/books/{book_id}), so label cardinality stays bounded;
+# requests that match no route share the "unmatched" label.
+class PrometheusMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._durations = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched")
+            # Cache the labelled children: labels() takes a lock on every call
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations[key] = HTTP_REQUEST_DURATION.labels(*key)
+            duration.observe(elapsed)
+            HTTP_REQUESTS.labels(*key, status_code).inc()
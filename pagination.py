@@ -0,0 +1,33 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+
+# Opaque keyset cursor: clients pass it back verbatim to fetch the next page
+def encode_cursor(last_id):
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(last_id)
+        return last_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Columns to load for a fields= projection ("title,author"); the id is always included
+def parse_fields(fields, model, allowed):
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    names = ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
+    return [getattr(model, name) for name in names]
@@ -0,0 +1,232 @@
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.neighbors import NearestNeighbors
+
+from metrics import RECOMMENDATION_INDEX_BUILD_DURATION
+
+
+# Immutable view of the recommendation index at one version.
+# Features mirror the original model: one-hot genre plus standard-scaled average_rating.
+class RecommendationSnapshot:
+    def __init__(self, version, ids, titles, genres, ratings, genre_codes, n_genres, n_neighbors):
+        self.version = version
+        self.ids = ids
+        self.titles = titles
+        self.genres = genres
+        self.ratings = ratings
+        self.n_neighbors = n_neighbors
+        self.ratings_scaled = self._scale(ratings)
+        self.features = self._build_features(genre_codes, n_genres, self.ratings_scaled)
+        # Hash lookups instead of scanning titles; duplicate titles resolve to the lowest id
+        self.row_by_id = {int(book_id): row for row, book_id in enumerate(ids)}
+        self.row_by_title = {}
+        for row, title in enumerate(titles):
+            self.row_by_title.setdefault(title, row)
+        self.model = None
+        if len(ids):
+            self.model = NearestNeighbors(n_neighbors=min(n_neighbors + 1, len(ids)), metric='euclidean')
+            self.model.fit(self.features)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Same scaling StandardScaler applies: population std, and a zero std scales by 1
+    @staticmethod
+    def _scale(ratings):
+        if not len(ratings):
+            return ratings
+        std = ratings.std()
+        return (ratings - ratings.mean()) / (std if std > 0 else 1.0)
+
+    @staticmethod
+    def _build_features(genre_codes, n_genres, ratings_scaled):
+        n = len(ratings_scaled)
+        if n == 0:
+            return sparse.csr_matrix((0, n_genres + 1))
+        rows = np.concatenate([np.arange(n), np.arange(n)])
+        cols = np.concatenate([genre_codes, np.full(n, n_genres)])
+        data = np.concatenate([np.ones(n), ratings_scaled])
+        return sparse.csr_matrix((data, (rows, cols)), shape=(n, n_genres + 1))
+
+    def find_row(self, book_title):
+        row = self.row_by_title.get(book_title)
+        if row is None:
+            raise IndexError(book_title)
+        return row
+
+    def _record(self, row):
+        return {'title': self.titles[row], 'genre': self.genres[row], 'average_rating': float(self.ratings[row])}
+
+    # One kneighbors call over the stacked feature rows of every target book
+    def recommend_rows(self, rows, n_neighbors=None):
+        n_neighbors = n_neighbors or self.n_neighbors
+        if not len(rows):
+            return []
+        distances, indices = self.model.kneighbors(self.features[rows], n_neighbors=min(n_neighbors + 1, len(self)))
+        results = []
+        for row, row_indices in zip(rows, indices):
+            # Skip the target book itself rather than assuming it is the first neighbor
+            neighbors = [i for i in row_indices if i != row][:n_neighbors]
+            results.append([self._record(i) for i in neighbors])
+        return results
+
+    def recommend(self, book_title, n_neighbors=None):
+        return self.recommend_rows([self.find_row(book_title)], n_neighbors)[0]
+
+    # Re-rank content-similarity candidates for the book at `row`: score is the similarity plus
+    # a bonus for sharing its genre and a term for the (scaled) average rating
+    def rerank(self, row, candidate_ids, similarities, n_neighbors=None, genre_weight=0.1, rating_weight=0.05):
+        n_neighbors = n_neighbors or self.n_neighbors
+        scored = []
+        for book_id, similarity in zip(candidate_ids, similarities):
+            candidate = self.row_by_id.get(int(book_id))
+            # Candidates written after this snapshot was published are skipped
+            if candidate is None or candidate == row:
+                continue
+            score = float(similarity) + rating_weight * float(self.ratings_scaled[candidate])
+            if self.genres[candidate] == self.genres[row]:
+                score += genre_weight
+            scored.append((score, candidate))
+        scored.sort(key=lambda item: -item[0])
+        return [dict(self._record(candidate), score=score) for score, candidate in scored[:n_neighbors]]
+
+
+# Long-lived recommendation index. Writers patch rows in place under a short lock; refresh()
+# copies the rows, builds a snapshot outside the lock and publishes it by swapping a reference.
+# Readers always get the last published snapshot, so a query only costs a neighbor lookup;
+# refresh() runs off the request path, and a burst of writes costs a single rebuild.
+class RecommendationIndex:
+    def __init__(self, n_neighbors=2, initial_capacity=1024):
+        self.n_neighbors = n_neighbors
+        self._lock = threading.Lock()
+        # Serializes builds so snapshots are published in version order
+        self._build_lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+        self._reset(initial_capacity)
+
+    def _reset(self, capacity):
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._genre_codes = np.zeros(capacity, dtype=np.int64)
+        self._ratings = np.zeros(capacity, dtype=np.float64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._titles = np.empty(capacity, dtype=object)
+        self._genres = np.empty(capacity, dtype=object)
+        self._size = 0
+        self._free_slots = []
+        self._slot_by_id = {}
+        self._genre_vocab = {}
+        self._dirty = True
+
+    @property
+    def version(self):
+        return self._version
+
+    # Whether writes have happened since the published snapshot was copied
+    @property
+    def dirty(self):
+        return self._dirty
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        for name in ('_ids', '_genre_codes', '_ratings', '_alive', '_titles', '_genres'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype) if old.dtype != object else np.empty(capacity, dtype=object)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _genre_code(self, genre):
+        code = self._genre_vocab.get(genre)
+        if code is None:
+            code = self._genre_vocab[genre] = len(self._genre_vocab)
+        return code
+
+    def _upsert(self, book):
+        slot = self._slot_by_id.get(book.id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                if self._size == len(self._ids):
+                    self._grow()
+                slot = self._size
+                self._size += 1
+            self._slot_by_id[book.id] = slot
+        self._ids[slot] = book.id
+        self._genre_codes[slot] = self._genre_code(book.genre)
+        self._ratings[slot] = book.average_rating or 0.0
+        self._alive[slot] = True
+        self._titles[slot] = book.title
+        self._genres[slot] = book.genre
+        self._dirty = True
+
+    # Replace the whole index, e.g. at startup
+    def load(self, books):
+        books = list(books)
+        with self._lock:
+            self._reset(max(len(books), 1024))
+            for book in books:
+                self._upsert(book)
+
+    def upsert(self, book):
+        with self._lock:
+            self._upsert(book)
+
+    def upsert_many(self, books):
+        with self._lock:
+            for book in books:
+                self._upsert(book)
+
+    def remove(self, book_id):
+        with self._lock:
+            slot = self._slot_by_id.pop(book_id, None)
+            if slot is None:
+                return
+            self._alive[slot] = False
+            self._titles[slot] = None
+            self._genres[slot] = None
+            self._free_slots.append(slot)
+            self._dirty = True
+
+    # Build a snapshot from a copy of the current rows and publish it. Writers only wait for the copy.
+    def refresh(self):
+        with self._build_lock:
+            with self._lock:
+                if not self._dirty and self._snapshot is not None:
+                    return self._snapshot
+                rows = np.flatnonzero(self._alive[:self._size])
+                # Keep insertion (id) order so ties resolve the way a fresh table scan would
+                rows = rows[np.argsort(self._ids[rows], kind='stable')]
+                ids = self._ids[rows]
+                titles = self._titles[rows]
+                genres = self._genres[rows]
+                ratings = self._ratings[rows]
+                genre_codes = self._genre_codes[rows]
+                n_genres = len(self._genre_vocab)
+                self._version += 1
+                version = self._version
+                # Writes from here on mark the index dirty again for the next refresh
+                self._dirty = False
+
+            started_at = time.perf_counter()
+            snapshot = RecommendationSnapshot(
+                version=version,
+                ids=ids,
+                titles=titles.tolist(),
+                genres=genres.tolist(),
+                ratings=ratings,
+                genre_codes=genre_codes,
+                n_genres=n_genres,
+                n_neighbors=self.n_neighbors,
+            )
+            RECOMMENDATION_INDEX_BUILD_DURATION.labels("features").observe(time.perf_counter() - started_at)
+            self._snapshot = snapshot
+            return snapshot
+
+    # The last published snapshot; only the very first call builds one
+    def snapshot(self):
+        snapshot = self._snapshot
+        return snapshot if snapshot is not None else self.refresh()
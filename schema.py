@@ -0,0 +1,81 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from search import SEARCH_INDEXES
+
+# Idempotent DDL for databases created before a schema change. create_all only creates
+# missing tables, so new indexes and columns on existing tables are added here.
+# Everything here runs at startup and must stay fast on a large catalog.
+UPGRADE_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_reviews_book_id_id ON reviews (book_id, id)",
+]
+
+# Statements that only apply to PostgreSQL (a column with a constant default is a catalog-only change)
+POSTGRES_UPGRADE_STATEMENTS = [
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS review_count INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE books ADD COLUMN IF NOT EXISTS rating_sum INTEGER NOT NULL DEFAULT 0",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+]
+
+# Advisory lock keys, so API processes starting together and concurrent migration runs
+# do not race the same DDL
+SCHEMA_UPGRADE_LOCK = 7_420_001
+SCHEMA_MIGRATION_LOCK = 7_420_002
+
+
+async def upgrade_schema(conn):
+    statements = list(UPGRADE_STATEMENTS)
+    if conn.dialect.name == "postgresql":
+        # Released when the startup transaction commits
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_UPGRADE_LOCK})
+        statements += POSTGRES_UPGRADE_STATEMENTS
+    for statement in statements:
+        await conn.execute(text(statement))
+
+
+# A failed concurrent build leaves an invalid index behind, which IF NOT EXISTS would keep
+async def create_index_concurrently(conn, name, definition):
+    result = await conn.execute(
+        text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": name}
+    )
+    if result.scalar_one_or_none() is False:
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}"))
+
+
+# One-off migration for changes too slow to run at startup on a large catalog. Indexes are built
+# with CREATE INDEX CONCURRENTLY, so the API keeps reading and writing books meanwhile. It runs on
+# its own connection without the API's query timeouts. Safe to re-run; a no-op outside Postgres.
+async def migrate(url):
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                return
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if (await conn.execute(text("SELECT to_regclass('books')"))).scalar() is None:
+                raise RuntimeError("The books table does not exist yet; start the API once to create it")
+            await conn.execute(text("SET statement_timeout = 0"))
+            await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_MIGRATION_LOCK})
+            try:
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for name, definition in SEARCH_INDEXES.items():
+                    await create_index_concurrently(conn, name, definition)
+                # Replaced by the expression index. Dropping a column only touches the catalog,
+                # but it needs a brief exclusive lock, so give up rather than queue behind long queries.
+                await conn.execute(text("SET lock_timeout = '5s'"))
+                await conn.execute(text("ALTER TABLE books DROP COLUMN IF EXISTS search_vector"))
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_MIGRATION_LOCK})
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from database import settings
+
+    asyncio.run(migrate(settings.url))
@@ -0,0 +1,87 @@
+import difflib
+
+from sqlalchemy import text
+
+# Weighted document: title matters most, then author and genre, then the summary.
+# Indexed as an expression, so adding it never rewrites the books table; queries must use
+# exactly this expression for Postgres to match them to the index.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(author, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(genre, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(summary, '')), 'C')"
+)
+
+# Built once by the migration in schema.py (python schema.py), not at startup
+SEARCH_INDEXES = {
+    "ix_books_search_document": f"ON books USING GIN (({SEARCH_VECTOR_SQL}))",
+    "ix_books_title_trgm": "ON books USING GIN (title gin_trgm_ops)",
+}
+
+SEARCH_COLUMNS = "id, title, author, genre, year_published, average_rating"
+
+# Full-text match on the weighted document, or trigram match on the title for typos.
+# Both predicates are served by GIN indexes; the score adds text rank and title similarity.
+POSTGRES_SEARCH_SQL = text(f"""
+    SELECT {SEARCH_COLUMNS},
+           ts_rank_cd({SEARCH_VECTOR_SQL}, query) + similarity(title, :q) AS score
+    FROM books, websearch_to_tsquery('english', :q) AS query
+    WHERE ({SEARCH_VECTOR_SQL}) @@ query OR title % :q
+    ORDER BY score DESC, id
+    LIMIT :limit
+""")
+
+POSTGRES_CLOSEST_TITLE_SQL = text("""
+    SELECT title FROM books
+    WHERE title % :q
+    ORDER BY similarity(title, :q) DESC, id
+    LIMIT 1
+""")
+
+# Portable fallback (e.g. SQLite for local runs): substring scan, ranked in Python
+FALLBACK_SEARCH_SQL = text(f"""
+    SELECT {SEARCH_COLUMNS} FROM books
+    WHERE lower(title) LIKE :pattern OR lower(author) LIKE :pattern
+       OR lower(genre) LIKE :pattern OR lower(summary) LIKE :pattern
+    LIMIT :scan_limit
+""")
+
+FALLBACK_SCAN_LIMIT = 1000
+
+
+def is_postgres(db):
+    return db.bind.dialect.name == "postgresql"
+
+
+def title_similarity(a, b):
+    return difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+
+# Ranked search over title, author, genre and summary
+async def search_books(db, q, limit):
+    if is_postgres(db):
+        result = await db.execute(POSTGRES_SEARCH_SQL, {"q": q, "limit": limit})
+        return [dict(row._mapping) for row in result]
+
+    result = await db.execute(FALLBACK_SEARCH_SQL, {"pattern": f"%{q.lower()}%", "scan_limit": FALLBACK_SCAN_LIMIT})
+    books = [dict(row._mapping, score=title_similarity(q, row.title)) for row in result]
+    books.sort(key=lambda book: (-book["score"], book["id"]))
+    return books[:limit]
+
+
+# Closest title to a possibly misspelled one, or None
+async def find_closest_title(db, title):
+    if is_postgres(db):
+        result = await db.execute(POSTGRES_CLOSEST_TITLE_SQL, {"q": title})
+        return result.scalar_one_or_none()
+
+    words = [word for word in title.lower().split() if len(word) > 2] or [title.lower()]
+    candidates = set()
+    for word in words:
+        result = await db.execute(
+            text("SELECT title FROM books WHERE lower(title) LIKE :pattern LIMIT :scan_limit"),
+            {"pattern": f"%{word}%", "scan_limit": FALLBACK_SCAN_LIMIT},
+        )
+        candidates.update(result.scalars())
+    matches = difflib.get_close_matches(title, list(candidates), n=1, cutoff=0.6)
+    return matches[0] if matches else None
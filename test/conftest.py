@@ -0,0 +1,53 @@
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app as books_app
+
+
+def session_dependency(Session):
+    async def get_db():
+        async with Session() as db:
+            yield db
+    return get_db
+
+
+# make_database(*rows): a fresh in-memory SQLite database with the app's tables and the given
+# rows; returns its session factory. Every database made in a test is disposed after it.
+@pytest_asyncio.fixture
+async def make_database():
+    engines = []
+
+    async def make(*rows):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        engines.append(engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(books_app.Base.metadata.create_all)
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        if rows:
+            async with Session() as db:
+                db.add_all(rows)
+                await db.commit()
+        return Session
+
+    yield make
+    for engine in engines:
+        await engine.dispose()
+
+
+# api_client(Session, user=None, read_session=None): an ASGI client for the app whose database
+# dependencies, and SessionLocal for background work, use Session (reads use read_session when
+# given). With user set, requests are authenticated as that user.
+@pytest.fixture
+def api_client(monkeypatch):
+    def make(Session, user=None, read_session=None):
+        overrides = books_app.app.dependency_overrides
+        monkeypatch.setitem(overrides, books_app.get_db, session_dependency(Session))
+        monkeypatch.setitem(overrides, books_app.get_read_db, session_dependency(read_session or Session))
+        monkeypatch.setattr(books_app, "SessionLocal", Session)
+        if user is not None:
+            monkeypatch.setitem(overrides, books_app.require_active_user, lambda: user)
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=books_app.app), base_url="http://test")
+    return make
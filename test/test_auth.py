@@ -1,6 +1,11 @@
+import time
+
 import pytest
 from httpx import AsyncClient
+
+import app as books_app
 from app import app
+from auth import AuthCache, status_error
 
 # Test user login functionality
 @pytest.mark.asyncio
@@ -14,6 +19,7 @@ async def test_login():
         assert response.status_code == 200
         data = response.json()
         assert "access_token" in data
+        assert "refresh_token" in data
 
 # Test login failure with incorrect credentials
 @pytest.mark.asyncio
@@ -26,3 +32,68 @@ async def test_invalid_login():
         response = await ac.post("/login/", json=payload)
         assert response.status_code == 401
         assert response.json()["detail"] == "Invalid username or password"
+
+
+# Test verified claims are reused until the token expires
+def test_claims_cached_until_expiry():
+    cache = AuthCache()
+    calls = []
+
+    def verify():
+        calls.append(1)
+        return {"sub": "alice", "exp": time.time() + 60}
+
+    assert cache.claims("token", verify)["sub"] == "alice"
+    assert cache.claims("token", verify)["sub"] == "alice"
+    assert len(calls) == 1
+
+    # An already-expired token is never cached
+    cache.claims("expired", lambda: {"sub": "bob", "exp": time.time() - 1})
+    assert len(cache.tokens) == 1
+
+# Test invalid tokens are not cached and keep raising
+def test_claims_verification_errors():
+    cache = AuthCache()
+
+    def verify():
+        raise ValueError("bad signature")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.claims("forged", verify)
+    assert cache.verifications == 2
+
+# Test status changes take effect once the cached status is invalidated
+@pytest.mark.asyncio
+async def test_status_invalidation():
+    cache = AuthCache()
+    statuses = {"alice": 1}
+
+    async def load(username):
+        return statuses.get(username)
+
+    assert await cache.status("alice", load) == 1
+    statuses["alice"] = 0
+    assert await cache.status("alice", load) == 1
+    cache.invalidate_user("alice")
+    assert status_error(await cache.status("alice", load)) == "User is inactive"
+    assert status_error(await cache.status("nobody", load)) == "User not found"
+
+# Test only the user themselves or an admin can change a user's status, and only to a defined status
+@pytest.mark.asyncio
+async def test_status_change_requires_self_or_admin(monkeypatch, make_database, api_client):
+    Session = await make_database(*[books_app.User(username=name, password="x", active=1) for name in ("alice", "bob", "root")])
+    current_user = {"name": "alice"}
+    monkeypatch.setitem(app.dependency_overrides, books_app.require_active_user, lambda: current_user["name"])
+    monkeypatch.setattr(books_app, "ADMIN_USERS", {"root"})
+    async with api_client(Session) as ac:
+        response = await ac.put("/users/bob/status", json={"active": 0})
+        assert response.status_code == 403
+        response = await ac.put("/users/alice/status", json={"active": 0})
+        assert response.status_code == 200
+        # 2 is not a defined status
+        response = await ac.put("/users/alice/status", json={"active": 2})
+        assert response.status_code == 422
+        current_user["name"] = "root"
+        response = await ac.put("/users/alice/status", json={"active": 1})
+        assert response.json() == {"username": "alice", "active": 1}
@@ -0,0 +1,19 @@
+from benchmarks.run import compare, percentile
+
+
+def result(scenario, rps, p99_ms, concurrency=16):
+    return {"scenario": scenario, "concurrency": concurrency, "rps": rps, "p99_ms": p99_ms}
+
+# Test percentiles pick from the sorted latencies
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 51
+    assert percentile(values, 99) == 100
+    assert percentile([7], 99) == 7
+
+# Test only throughput drops or p99 rises beyond the threshold count as regressions
+def test_compare_flags_regressions():
+    baseline = {"results": [result("get_book", 1000, 10.0), result("get_books", 500, 20.0), result("get_reviews", 300, 5.0)]}
+    current = {"results": [result("get_book", 950, 10.5), result("get_books", 300, 20.0), result("get_reviews", 300, 8.0), result("new", 1, 1)]}
+    regressions = compare(baseline, current, threshold=0.2)
+    assert [r["scenario"] for r in regressions] == ["get_books", "get_reviews"]
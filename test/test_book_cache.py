@@ -0,0 +1,20 @@
+import pytest
+
+import app as books_app
+
+
+def dune(title):
+    return books_app.Book(title=title, author="Frank Herbert", genre="Sci-Fi", year_published=1965, summary="Spice.")
+
+# Test a cache miss reads the primary, so a lagging replica cannot re-cache an updated row
+@pytest.mark.asyncio
+async def test_book_cache_filled_from_primary(make_database, api_client):
+    Primary = await make_database(dune("Dune Messiah"))
+    Replica = await make_database(dune("Dune"))
+    await books_app.book_cache.invalidate(1)
+    try:
+        async with api_client(Primary, read_session=Replica) as client:
+            assert (await client.get("/books/1")).json()["title"] == "Dune Messiah"
+        assert (await books_app.book_cache.get(1))["body"]["title"] == "Dune Messiah"
+    finally:
+        await books_app.book_cache.invalidate(1)
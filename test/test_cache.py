@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from cache import SummaryCache, TTLCache, summary_cache_key
+
+
+# Test least recently used entries are evicted first
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+# Test expired entries count as misses
+def test_ttl_expiry():
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+# Test keys ignore whitespace differences but not parameters
+def test_key_normalization():
+    assert summary_cache_key("A  book\n") == summary_cache_key("A book")
+    assert summary_cache_key("A book", {"max_length": 100}) != summary_cache_key("A book")
+
+# Test concurrent identical requests trigger only one upstream call
+@pytest.mark.asyncio
+async def test_single_flight():
+    cache = SummaryCache(maxsize=8, ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"summary": "short"}
+
+    results = await asyncio.gather(*(cache.get_or_compute("same text", {}, compute) for _ in range(10)))
+    assert all(result == {"summary": "short"} for result in results)
+    assert calls == 1
+
+    await cache.get_or_compute("same  text", {}, compute)
+    assert calls == 1
+    assert cache.stats()["local"]["hits"] == 1
+
+# Test failures are not cached
+@pytest.mark.asyncio
+async def test_errors_not_cached():
+    cache = SummaryCache(maxsize=8, ttl=60)
+
+    async def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute("text", {}, fail)
+    assert len(cache.local) == 0
+
+# Test invalidation removes entries and a fill that raced with it is discarded
+@pytest.mark.asyncio
+async def test_read_through_invalidation():
+    from cache import ReadThroughCache
+
+    cache = ReadThroughCache("book:", maxsize=8, ttl=60)
+    token = cache.fill_token(1)
+    await cache.set(1, {"title": "old"}, token)
+    assert await cache.get(1) == {"title": "old"}
+
+    stale_token = cache.fill_token(1)
+    await cache.invalidate(1)
+    assert await cache.get(1) is None
+    await cache.set(1, {"title": "old"}, stale_token)
+    assert await cache.get(1) is None
+    assert cache.stats()["stale_fills_skipped"] == 1
+
+    await cache.set(1, {"title": "new"}, cache.fill_token(1))
+    assert await cache.get(1) == {"title": "new"}
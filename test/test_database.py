@@ -0,0 +1,18 @@
+from database import DatabaseSettings, create_engine_for
+
+
+# Test pool and asyncpg settings are applied to Postgres engines
+def test_postgres_engine_settings(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_STATEMENT_CACHE_SIZE", "50")
+    settings = DatabaseSettings()
+    engine = create_engine_for("postgresql+asyncpg://user:pw@localhost/db", settings, "primary")
+    assert engine.pool.size() == 3
+    assert engine.pool.metrics_role == "primary"
+    assert engine.url.query["prepared_statement_cache_size"] == "50"
+    assert engine.echo is False
+
+# Test SQLite URLs (used for local runs and benchmarks) skip the Postgres-only options
+def test_sqlite_engine():
+    engine = create_engine_for("sqlite+aiosqlite:///:memory:", DatabaseSettings(), "primary")
+    assert engine.url.get_backend_name() == "sqlite"
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import numpy as np
+from embeddings import HashingEmbedder, SemanticIndex, normalize
+from recommendations import RecommendationIndex
+
+SUMMARIES = {
+    1: "A young wizard attends a school of magic",
+    2: "Wizards and witches at a school of magic fight a dark lord",
+    3: "A spaceship crew explores distant galaxies",
+    4: "Alien civilizations and travel between distant galaxies",
+}
+
+
+# Test related summaries are each other's nearest neighbors
+def test_semantic_neighbors():
+    index = SemanticIndex(HashingEmbedder())
+    index.upsert_many(SUMMARIES.items())
+    assert index.search(1, 1)[0].tolist() == [2]
+    assert index.search(3, 1)[0].tolist() == [4]
+    index.remove(2)
+    assert 2 not in index.search(1, 3)[0].tolist()
+
+# Test unchanged summaries are not re-embedded, and vectors survive a reopen of the memmap store
+def test_store_persists(tmp_path):
+    path = str(tmp_path / "vectors")
+    index = SemanticIndex(HashingEmbedder(), path=path)
+    index.upsert_many(SUMMARIES.items())
+    index.upsert_many(SUMMARIES.items())
+    assert index.embedded == 4
+    index.close()
+
+    reopened = SemanticIndex(HashingEmbedder(), path=path)
+    assert len(reopened) == 4 and reopened.stats()["persistent"]
+    reopened.upsert_many(SUMMARIES.items())
+    assert reopened.embedded == 0
+    assert reopened.search(1, 1)[0].tolist() == [2]
+
+# Test a second process on the same store works on a private copy and never writes the files
+def test_store_has_one_writer(tmp_path):
+    path = str(tmp_path / "vectors")
+    writer = SemanticIndex(HashingEmbedder(), path=path)
+    writer.upsert_many(list(SUMMARIES.items())[:2])
+    writer.flush()
+
+    other = SemanticIndex(HashingEmbedder(), path=path)
+    assert not other.stats()["persistent"] and len(other) == 2
+    other.upsert_many([(5, "A brand new summary"), (1, "A rewritten summary")])
+    assert other.embedded == 2 and len(other) == 3
+
+    writer.close()
+    reopened = SemanticIndex(HashingEmbedder(), path=path)
+    assert sorted(reopened.store.slot_by_id) == [1, 2]
+    reopened.upsert_many(list(SUMMARIES.items())[:2])
+    assert reopened.embedded == 0
+
+# Test retain keeps books beyond the scanned range, e.g. created while the store was loading
+def test_retain_up_to():
+    index = SemanticIndex(HashingEmbedder())
+    index.upsert_many(SUMMARIES.items())
+    index.retain([1, 3], up_to=2)
+    assert sorted(index.store.slot_by_id) == [1, 3, 4]
+
+# Test the IVF index finds the same neighbors as an exact scan, including unindexed writes
+def test_ivf_matches_exact():
+    rng = np.random.default_rng(0)
+    centers = normalize(rng.standard_normal((20, 32)).astype(np.float32))
+    vectors = normalize(centers[rng.integers(0, 20, 2000)] + 0.1 * rng.standard_normal((2000, 32)).astype(np.float32))
+
+    class FixedEmbedder:
+        dim = 32
+        name = "fixed"
+
+        def embed(self, texts):
+            return np.stack([vectors[int(text)] for text in texts])
+
+    index = SemanticIndex(FixedEmbedder(), exact_threshold=1000, nprobe=8)
+    index.upsert_many([(i + 1, str(i)) for i in range(1500)], rebuild=False)
+    index.rebuild()
+    index.upsert_many([(i + 1, str(i)) for i in range(1500, 2000)], rebuild=False)
+    assert index.stats()["ann"] and index.stats()["pending"] == 500
+
+    for book_id in (1, 700, 1800):
+        exact = np.argsort(-(vectors @ vectors[book_id - 1]))[1:6] + 1
+        found, _ = index.search(book_id, 5)
+        assert len(set(found) & set(exact)) >= 4
+
+# Test re-ranking adds the same-genre bonus to content similarity
+def test_rerank_prefers_genre():
+    recommendations = RecommendationIndex()
+    recommendations.load([
+        SimpleNamespace(id=1, title="Target", genre="Fantasy", average_rating=4.0),
+        SimpleNamespace(id=2, title="Other genre", genre="Sci-Fi", average_rating=4.0),
+        SimpleNamespace(id=3, title="Same genre", genre="Fantasy", average_rating=4.0),
+    ])
+    snapshot = recommendations.snapshot()
+    ranked = snapshot.rerank(0, [2, 3], [0.5, 0.45], n_neighbors=2, genre_weight=0.1)
+    assert [r["title"] for r in ranked] == ["Same genre", "Other genre"]
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+from executors import BoundedExecutor, ExecutorSaturated
+
+
+# Test work runs off the event loop thread and results come back
+@pytest.mark.asyncio
+async def test_run_in_worker_thread():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    try:
+        thread_name = await executor.run(lambda: threading.current_thread().name)
+        assert thread_name != threading.current_thread().name
+        stats = executor.stats()
+        assert stats["completed"] == 1 and stats["in_flight"] == 0
+    finally:
+        executor.shutdown()
+
+# Test calls beyond workers + queue depth are rejected instead of queued
+@pytest.mark.asyncio
+async def test_rejects_when_saturated():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+    try:
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        assert executor.stats()["rejected"] == 1
+        assert executor.stats()["peak_in_flight"] == 2
+    finally:
+        release.set()
+        executor.shutdown()
+
+# Test failures are counted and re-raised
+@pytest.mark.asyncio
+async def test_failures_propagate():
+    executor = BoundedExecutor("test", max_workers=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(lambda: 1 / 0)
+        assert executor.stats()["failed"] == 1
+    finally:
+        executor.shutdown()
@@ -0,0 +1,38 @@
+import pytest
+from ingest import batched, iter_csv_records, iter_ndjson_records
+
+
+async def chunks_of(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(records):
+    return [record async for record in records]
+
+# Test NDJSON lines split across chunks (including inside a multi-byte character) are reassembled
+@pytest.mark.asyncio
+async def test_ndjson_records():
+    data = '{"title": "Café"}\n\n[1, 2]\n{"title": "B"}'.encode("utf-8")
+    records = await collect(iter_ndjson_records(chunks_of(data, 3)))
+    assert records[0] == (1, {"title": "Café"})
+    assert records[1][0] == 3 and isinstance(records[1][1], ValueError)
+    assert records[2] == (4, {"title": "B"})
+
+# Test CSV quoted fields may contain commas, quotes and newlines
+@pytest.mark.asyncio
+async def test_csv_records():
+    data = b'title,summary\n"A, ""B""","line one\nline two"\nC,D\nE\n'
+    records = await collect(iter_csv_records(chunks_of(data, 5)))
+    assert records[0] == (2, {"title": 'A, "B"', "summary": "line one\nline two"})
+    assert records[1] == (4, {"title": "C", "summary": "D"})
+    assert records[2][0] == 5 and isinstance(records[2][1], ValueError)
+
+# Test batching keeps order and emits the remainder
+@pytest.mark.asyncio
+async def test_batched():
+    async def numbers():
+        for i in range(7):
+            yield i
+
+    assert await collect(batched(numbers(), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
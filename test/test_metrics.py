@@ -0,0 +1,39 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+from metrics import PrometheusMiddleware
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+# Test requests are counted and timed per route template, not per concrete path
+@pytest.mark.asyncio
+async def test_route_metrics():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+
+    @app.get("/widgets/{widget_id}")
+    async def get_widget(widget_id: int):
+        if widget_id == 0:
+            raise HTTPException(status_code=404, detail="Widget not found")
+        return {"id": widget_id}
+
+    route = "/widgets/{widget_id}"
+    ok_before = sample("http_requests_total", method="GET", route=route, status="200")
+    missing_before = sample("http_requests_total", method="GET", route=route, status="404")
+    unmatched_before = sample("http_requests_total", method="GET", route="unmatched", status="404")
+    timed_before = sample("http_request_duration_seconds_count", method="GET", route=route)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/widgets/1")
+        await client.get("/widgets/2")
+        await client.get("/widgets/0")
+        await client.get("/nowhere")
+
+    assert sample("http_requests_total", method="GET", route=route, status="200") == ok_before + 2
+    assert sample("http_requests_total", method="GET", route=route, status="404") == missing_before + 1
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") == unmatched_before + 1
+    assert sample("http_request_duration_seconds_count", method="GET", route=route) == timed_before + 3
+    assert sample("http_requests_in_flight") == 0
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+from llama3_service.model import ModelLoader, ModelNotReady, load_summarizer
+
+
+# Test the model is only handed out once loading and warm-up have finished
+def test_ready_after_load_and_warm_up():
+    release = threading.Event()
+    warmed = []
+    states = []
+
+    def load():
+        release.wait(5)
+        return "pipeline"
+
+    loader = ModelLoader(load, warm_up=warmed.append, on_state=lambda state, timings: states.append(state))
+    loader.start()
+    with pytest.raises(ModelNotReady):
+        loader.get()
+    assert loader.status()["state"] == "loading"
+
+    release.set()
+    assert loader.ready.wait(5)
+    assert loader.get() == "pipeline"
+    assert warmed == ["pipeline"]
+    assert states == ["loading", "warming", "ready"]
+    assert {"load_seconds", "warmup_seconds"} <= set(loader.status())
+
+# Test a failed load is reported and never becomes ready
+def test_failed_load():
+    def load():
+        raise OSError("no such model")
+
+    loader = ModelLoader(load)
+    loader.start()
+    loader._thread.join(5)
+    assert loader.state == "failed"
+    assert loader.status()["error"] == "no such model"
+    with pytest.raises(ModelNotReady, match="failed"):
+        loader.get()
+
+# Test an unknown backend is rejected before anything is loaded
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown summarizer backend"):
+        load_summarizer("any-model", backend="tensorrt")
@@ -0,0 +1,21 @@
+import pytest
+from fastapi import HTTPException
+from app import Book
+from pagination import decode_cursor, encode_cursor, parse_fields
+
+
+# Test cursors round-trip and reject tampering
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+    with pytest.raises(HTTPException) as e:
+        decode_cursor("not-a-cursor")
+    assert e.value.status_code == 400
+
+# Test projections always include the id and reject unknown columns
+def test_parse_fields():
+    allowed = {"id", "title", "summary"}
+    assert parse_fields(None, Book, allowed) is None
+    columns = parse_fields("title, title,id", Book, allowed)
+    assert [column.key for column in columns] == ["id", "title"]
+    with pytest.raises(HTTPException):
+        parse_fields("password", Book, allowed)
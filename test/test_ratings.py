@@ -0,0 +1,63 @@
+import pytest
+import pytest_asyncio
+
+import app as books_app
+
+
+# Database with one book and no reviews yet
+@pytest_asyncio.fixture
+async def catalog(make_database):
+    return await make_database(
+        books_app.Book(title="Dune", author="Frank Herbert", genre="Sci-Fi", year_published=1965, summary="Spice.")
+    )
+
+
+async def get_book_row(Session, book_id=1):
+    async with Session() as db:
+        return await db.get(books_app.Book, book_id)
+
+# Test each review bumps the rating aggregates in the same UPDATE ... RETURNING
+@pytest.mark.asyncio
+async def test_add_review_updates_aggregates(catalog, api_client):
+    async with api_client(catalog) as client:
+        for rating in (5, 4):
+            response = await client.post("/books/1/reviews", json={"user_id": 1, "review_text": "Great", "rating": rating})
+            assert response.status_code == 200
+        book = await get_book_row(catalog)
+        assert (book.review_count, book.rating_sum, book.average_rating) == (2, 9, 4.5)
+        snapshot = books_app.recommendation_index.refresh()
+        assert snapshot.ratings[snapshot.row_by_id[1]] == 4.5
+
+        response = await client.post("/books/999/reviews", json={"user_id": 1, "review_text": "Great", "rating": 5})
+        assert response.status_code == 404
+
+# Test a PUT cannot overwrite the average rating derived from reviews
+@pytest.mark.asyncio
+async def test_update_keeps_average_rating(catalog, api_client):
+    async with api_client(catalog) as client:
+        for rating in (5, 4):
+            await client.post("/books/1/reviews", json={"user_id": 1, "review_text": "Great", "rating": rating})
+        payload = {"title": "Dune", "author": "Frank Herbert", "genre": "Sci-Fi", "year_published": 1965, "summary": "Spice.", "average_rating": 0.0}
+        response = await client.put("/books/1", json=payload)
+        assert response.status_code == 200
+        assert response.json()["average_rating"] == 4.5
+
+# Test the reconciler repairs drifted counts, sums and averages
+@pytest.mark.asyncio
+async def test_reconciler_fixes_drift(catalog, api_client):
+    async with api_client(catalog) as client:
+        for rating in (5, 4):
+            await client.post("/books/1/reviews", json={"user_id": 1, "review_text": "Great", "rating": rating})
+        async with catalog() as db:
+            await db.execute(books_app.update(books_app.Book).values(average_rating=0.0))
+            await db.commit()
+        assert await books_app.reconcile_ratings()
+        book = await get_book_row(catalog)
+        assert (book.review_count, book.rating_sum, book.average_rating) == (2, 9, 4.5)
+
+        async with catalog() as db:
+            await db.execute(books_app.update(books_app.Book).values(review_count=7, rating_sum=1))
+            await db.commit()
+        assert await books_app.reconcile_ratings()
+        book = await get_book_row(catalog)
+        assert (book.review_count, book.rating_sum, book.average_rating) == (2, 9, 4.5)
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+from recommendations import RecommendationIndex
+
+
+def make_book(id, title, genre, average_rating):
+    return SimpleNamespace(id=id, title=title, genre=genre, average_rating=average_rating)
+
+
+@pytest.fixture
+def index():
+    index = RecommendationIndex(n_neighbors=2, initial_capacity=2)
+    index.load([
+        make_book(1, "Book A", "Sci-Fi", 4.5),
+        make_book(2, "Book B", "Sci-Fi", 4.0),
+        make_book(3, "Book C", "Fantasy", 3.5),
+        make_book(4, "Book D", "Fantasy", 1.0),
+    ])
+    return index
+
+# Test neighbors prefer the same genre and never include the target book
+def test_recommend_same_genre_first(index):
+    recommendations = index.snapshot().recommend("Book A")
+    titles = [r["title"] for r in recommendations]
+    assert titles[0] == "Book B"
+    assert "Book A" not in titles
+    assert len(titles) == 2
+
+# Test unknown titles raise IndexError, which the API maps to a 404
+def test_recommend_unknown_title(index):
+    with pytest.raises(IndexError):
+        index.snapshot().recommend("Missing")
+
+# Test incremental updates publish a new snapshot without touching old ones
+def test_snapshots_are_versioned(index):
+    before = index.snapshot()
+    index.upsert(make_book(5, "Book E", "Sci-Fi", 4.4))
+    index.remove(2)
+    after = index.refresh()
+
+    assert after.version > before.version
+    assert len(before) == 4 and len(after) == 4
+    assert [r["title"] for r in before.recommend("Book A")][0] == "Book B"
+    assert [r["title"] for r in after.recommend("Book A")][0] == "Book E"
+
+# Test updating a book moves it rather than duplicating it
+def test_upsert_existing_book(index):
+    index.upsert(make_book(3, "Book C", "Sci-Fi", 4.5))
+    snapshot = index.refresh()
+    assert len(snapshot) == 4
+    assert snapshot.recommend("Book A")[0]["title"] == "Book C"
+
+# Test an unchanged index reuses its snapshot
+def test_snapshot_reused_without_writes(index):
+    assert index.snapshot() is index.snapshot()
+    assert index.refresh() is index.snapshot()
+
+# Test readers keep the published snapshot after a write until the next refresh
+def test_writes_publish_on_refresh(index):
+    before = index.snapshot()
+    index.upsert(make_book(5, "Book E", "Sci-Fi", 4.4))
+    assert index.dirty
+    assert index.snapshot() is before
+    after = index.refresh()
+    assert not index.dirty
+    assert index.snapshot() is after and len(after) == 5
+
+# Test the index grows past its initial capacity
+def test_index_grows(index):
+    index.upsert_many([make_book(i, f"Book {i}", "Drama", 3.0) for i in range(5, 20)])
+    snapshot = index.refresh()
+    assert len(snapshot) == 19
+    assert snapshot.titles[snapshot.row_by_id[19]] == "Book 19"
+
+# Test batch lookups return one result list per target, in request order
+def test_recommend_rows_batch(index):
+    snapshot = index.snapshot()
+    rows = [snapshot.row_by_title["Book A"], snapshot.row_by_id[4]]
+    results = snapshot.recommend_rows(rows, n_neighbors=1)
+    assert [r[0]["title"] for r in results] == ["Book B", "Book C"]
+    assert snapshot.recommend_rows([], n_neighbors=1) == []
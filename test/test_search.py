@@ -0,0 +1,30 @@
+import pytest
+import pytest_asyncio
+from app import Book
+from search import find_closest_title, search_books
+
+
+# Catalog on SQLite, which exercises the portable fallback path
+@pytest_asyncio.fixture
+async def db(make_database):
+    Session = await make_database(
+        Book(title="The Hobbit", author="J.R.R. Tolkien", genre="Fantasy", year_published=1937, summary="A hobbit's journey"),
+        Book(title="Dune", author="Frank Herbert", genre="Sci-Fi", year_published=1965, summary="Spice and sandworms"),
+    )
+    async with Session() as db:
+        yield db
+
+# Test search matches across columns and ranks by score
+@pytest.mark.asyncio
+async def test_search_books(db):
+    results = await search_books(db, "tolkien", 10)
+    assert [book["title"] for book in results] == ["The Hobbit"]
+    assert "score" in results[0]
+    assert [book["title"] for book in await search_books(db, "sandworms", 10)] == ["Dune"]
+    assert await search_books(db, "nothing like this", 10) == []
+
+# Test misspelled titles resolve to the closest book title
+@pytest.mark.asyncio
+async def test_find_closest_title(db):
+    assert await find_closest_title(db, "The Hobit") == "The Hobbit"
+    assert await find_closest_title(db, "Completely Unknown") is None
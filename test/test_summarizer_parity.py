@@ -0,0 +1,25 @@
+import os
+
+import pytest
+from llama3_service.parity import compare, current_rss_mb, word_f1
+
+
+# Test word-overlap F1 between summaries
+def test_word_f1():
+    assert word_f1("the cat sat", "the cat sat") == 1.0
+    assert word_f1("the cat sat", "a dog ran") == 0.0
+    assert word_f1("the cat sat down", "The cat sat") == pytest.approx(2 * 1.0 * 0.75 / 1.75)
+
+# Test backends are scored against the reference summaries
+def test_compare():
+    reference = {"summaries": ["a b c", "d e f"]}
+    result = {"summaries": ["a b c", "d e x"]}
+    compare(reference, result)
+    assert result["exact_matches"] == 1
+    assert result["min_f1"] == pytest.approx(2 / 3)
+    assert result["mean_f1"] == pytest.approx((1 + 2 / 3) / 2)
+
+# Test resident memory is read from /proc where it exists
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_current_rss():
+    assert current_rss_mb() > 0
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from llama3_service.batching import MicroBatcher
+
+
+# Test concurrent submissions are grouped into one call and fanned back out in order
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    def summarize(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    batcher = MicroBatcher(summarize, max_batch_size=4, max_wait_ms=50)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(*(batcher.submit(f"text {i}") for i in range(4)))
+        assert results == [f"TEXT {i}" for i in range(4)]
+        assert len(calls) == 1
+        assert batcher.stats()["avg_batch_size"] == 4
+    finally:
+        await batcher.stop()
+
+# Test batches never exceed max_batch_size
+@pytest.mark.asyncio
+async def test_batches_are_capped():
+    calls = []
+
+    def summarize(texts):
+        calls.append(len(texts))
+        return texts
+
+    observed = []
+    batcher = MicroBatcher(summarize, max_batch_size=2, max_wait_ms=50, on_batch=lambda size, seconds: observed.append(size))
+    await batcher.start()
+    try:
+        await asyncio.gather(*(batcher.submit(str(i)) for i in range(5)))
+        assert max(calls) == 2
+        assert sum(calls) == 5
+        assert observed == calls
+    finally:
+        await batcher.stop()
+
+# Test a bad input only fails its own request
+@pytest.mark.asyncio
+async def test_failure_is_isolated():
+    def summarize(texts):
+        if "bad" in texts:
+            raise ValueError("bad input")
+        return texts
+
+    batcher = MicroBatcher(summarize, max_batch_size=4, max_wait_ms=50)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit("good"), batcher.submit("bad"), batcher.submit("fine"), return_exceptions=True
+        )
+        assert results[0] == "good" and results[2] == "fine"
+        assert isinstance(results[1], ValueError)
+    finally:
+        await batcher.stop()
+
+# Test batchers given the same executor run on its one thread and leave it running when stopped
+@pytest.mark.asyncio
+async def test_shared_executor():
+    threads = set()
+
+    def summarize(texts):
+        threads.add(threading.current_thread().name)
+        return texts
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model")
+    batchers = [MicroBatcher(summarize, max_wait_ms=5, executor=executor) for _ in range(2)]
+    for batcher in batchers:
+        await batcher.start()
+    try:
+        await asyncio.gather(*(batcher.submit("text") for batcher in batchers))
+        await batchers[0].stop()
+        assert await batchers[1].submit("after") == "after"
+        assert len(threads) == 1 and threads.pop().startswith("model")
+    finally:
+        await batchers[1].stop()
+        executor.shutdown()
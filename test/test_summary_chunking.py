@@ -0,0 +1,77 @@
+import pytest
+from llama3_service.chunking import LongDocumentSummarizer, chunk_text, token_windows
+
+
+# Whitespace "tokenizer" standing in for the model tokenizer, with a 64-token window
+class WordTokenizer:
+    model_max_length = 64
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def encode(self, text, add_special_tokens=False):
+        return text.split()
+
+    def decode(self, tokens, **kwargs):
+        return " ".join(tokens)
+
+# Test windows respect the token budget, overlap, and cover the whole input
+def test_token_windows():
+    assert token_windows(5, 10, 2) == [(0, 5)]
+    windows = token_windows(25, 10, 2)
+    assert windows == [(0, 10), (8, 18), (16, 25)]
+    assert all(end - start <= 10 for start, end in windows)
+    with pytest.raises(ValueError):
+        token_windows(25, 10, 10)
+
+# Test chunks are decoded back to text
+def test_chunk_text():
+    text = " ".join(f"w{i}" for i in range(12))
+    chunks = chunk_text(WordTokenizer(), text, 5, 1)
+    assert chunks[0] == "w0 w1 w2 w3 w4"
+    assert chunks[1].startswith("w4 ")
+
+# Test long input is mapped chunk by chunk, then reduced once it fits
+@pytest.mark.asyncio
+async def test_map_reduce():
+    mapped = []
+
+    async def summarize_chunk(text):
+        mapped.append(text)
+        return text.split()[0]
+
+    async def summarize_final(text):
+        return f"final({text})"
+
+    summarizer = LongDocumentSummarizer(WordTokenizer(), summarize_chunk, summarize_final, chunk_tokens=10, overlap_tokens=0)
+    text = " ".join(f"w{i}" for i in range(30))
+    result = await summarizer.summarize(text)
+
+    assert len(mapped) == 3
+    assert result["summary"] == "final(w0\nw10\nw20)"
+    assert [stage["stage"] for stage in result["stages"]] == ["chunk", "map", "chunk", "reduce"]
+
+# Test the reduce step stops recursing at max_depth
+@pytest.mark.asyncio
+async def test_max_depth():
+    async def summarize_chunk(text):
+        return text
+
+    async def summarize_final(text):
+        return "done"
+
+    summarizer = LongDocumentSummarizer(WordTokenizer(), summarize_chunk, summarize_final, chunk_tokens=10, overlap_tokens=5, max_depth=2)
+    result = await summarizer.summarize(" ".join(["w"] * 40))
+    assert result["summary"] == "done"
+    assert max(stage["depth"] for stage in result["stages"]) == 2
+
+# Test chunks longer than the model window (minus special tokens) are rejected, not truncated
+@pytest.mark.asyncio
+async def test_chunk_tokens_fit_the_model():
+    async def summarize(text):
+        return text
+
+    summarizer = LongDocumentSummarizer(WordTokenizer(), summarize, summarize, chunk_tokens=62, overlap_tokens=0)
+    assert (await summarizer.summarize("short text"))["summary"] == "short text"
+    with pytest.raises(ValueError, match="at most 62"):
+        await summarizer.summarize("short text", chunk_tokens=63)
@@ -0,0 +1,174 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import app as books_app
+from upstream import UpstreamClient
+
+
+# Database with books 1-4: 1 has no summary but has reviews, 2 has nothing to summarize,
+# 3 has a description that the stub summarizer rejects, 4 already has a summary
+@pytest_asyncio.fixture
+async def catalog(make_database):
+    books = [
+        books_app.Book(title="T", author="A", genre="G", year_published=2000, summary=summary)
+        for summary in ["", " ", "fail " * 10, "A long imported description."]
+    ]
+    reviews = [books_app.Review(book_id=1, user_id=i, review_text=f"Review {i}", rating=4) for i in range(2)]
+    return await make_database(*books, *reviews)
+
+
+async def summarize(request):
+    content = json.loads(request.content)["content"]
+    if content.startswith("fail"):
+        return httpx.Response(500, json={"detail": "model error"})
+    return httpx.Response(200, json={"summary": f"Summary of: {content}"})
+
+
+@pytest.fixture
+def stub_llama3(monkeypatch):
+    client = UpstreamClient("llama3", "http://llama3-stub", transport=httpx.MockTransport(summarize), retries=0)
+    monkeypatch.setattr(books_app, "llama3_client", client)
+    monkeypatch.setattr(books_app, "SUMMARY_JOB_MAX_ATTEMPTS", 2)
+    return client
+
+# Test a "missing summaries" job summarizes from reviews, fails books with nothing to summarize,
+# skips books already queued, and reports progress
+@pytest.mark.asyncio
+async def test_missing_summaries_job(monkeypatch, stub_llama3, catalog):
+    monkeypatch.setattr(books_app, "SessionLocal", catalog)
+    await stub_llama3.start()
+    try:
+        async with catalog() as db:
+            job = await books_app.create_summary_job(db, "tester")
+            assert job.total == 2
+            assert (await books_app.create_summary_job(db, "tester")).total == 0
+            assert (await books_app.summary_job_progress(db, job.id))["status"] == "queued"
+
+        assert await books_app.process_summary_batch(10) == (2, 1)
+        assert await books_app.process_summary_batch(10) == (0, 0)
+
+        async with catalog() as db:
+            progress = await books_app.summary_job_progress(db, job.id)
+            assert (progress["status"], progress["done"], progress["failed"], progress["progress"]) == ("done", 1, 1, 1.0)
+            assert progress["errors"][0]["book_id"] == 2
+            assert (await db.get(books_app.Book, 1)).summary == "Summary of: Review 0\nReview 1"
+    finally:
+        await stub_llama3.close()
+
+# Test overwrite jobs summarize the current summary, upstream failures are retried up to SUMMARY_JOB_MAX_ATTEMPTS, and claimed items are not claimed twice
+@pytest.mark.asyncio
+async def test_retries_and_claims(monkeypatch, stub_llama3, catalog):
+    monkeypatch.setattr(books_app, "SessionLocal", catalog)
+    await stub_llama3.start()
+    try:
+        async with catalog() as db:
+            # Without overwrite, books that already have a summary are skipped
+            assert (await books_app.create_summary_job(db, "tester", [3, 4])).total == 0
+            job = await books_app.create_summary_job(db, "tester", [3, 4], overwrite=True)
+            first = await books_app.claim_summary_items(db, 1)
+            second = await books_app.claim_summary_items(db, 10)
+            assert [item.book_id for item in first] == [3]
+            assert [item.book_id for item in second] == [4]
+            # Release both claims, as an expired lease would
+            await db.execute(books_app.update(books_app.SummaryJobItem).values(status="pending", attempts=0))
+            await db.commit()
+
+        assert await books_app.process_summary_batch(10) == (2, 1)
+        assert await books_app.process_summary_batch(10) == (1, 0)
+
+        async with catalog() as db:
+            progress = await books_app.summary_job_progress(db, job.id)
+            assert (progress["done"], progress["failed"]) == (1, 1)
+            assert "500" in progress["errors"][0]["error"]
+            assert (await db.get(books_app.Book, 3)).summary.startswith("fail")
+    finally:
+        await stub_llama3.close()
+
+# Test expired items are reclaimed until they use up their attempts, then failed
+@pytest.mark.asyncio
+async def test_expired_leases(monkeypatch, stub_llama3, catalog):
+    monkeypatch.setattr(books_app, "SessionLocal", catalog)
+    async with catalog() as db:
+        job = await books_app.create_summary_job(db, "tester", [1, 2])
+        await db.execute(
+            books_app.update(books_app.SummaryJobItem)
+            .values(status="running", locked_at=0.0, attempts=books_app.SummaryJobItem.book_id)
+        )
+        await db.commit()
+        # Book 1's item has one attempt left; book 2's has none
+        assert [item.book_id for item in await books_app.claim_summary_items(db, 10)] == [1]
+        progress = await books_app.summary_job_progress(db, job.id)
+        assert (progress["running"], progress["failed"]) == (1, 1)
+        assert progress["errors"] == [{"book_id": 2, "error": "Lease expired on every attempt"}]
+
+# Test a cancelled worker hands its items back without using up an attempt, and a failing
+# batch hands them back at once instead of waiting for the lease
+@pytest.mark.asyncio
+async def test_unfinished_items_are_released(monkeypatch, stub_llama3, catalog):
+    monkeypatch.setattr(books_app, "SessionLocal", catalog)
+    requested = asyncio.Event()
+
+    async def hang(request):
+        requested.set()
+        await asyncio.Event().wait()
+
+    client = UpstreamClient("llama3", "http://llama3-stub", transport=httpx.MockTransport(hang), retries=0)
+    monkeypatch.setattr(books_app, "llama3_client", client)
+    await client.start()
+    try:
+        async with catalog() as db:
+            job = await books_app.create_summary_job(db, "tester", [1])
+
+        worker = asyncio.create_task(books_app.process_summary_batch(10))
+        await asyncio.wait_for(requested.wait(), 5)
+        worker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await worker
+        async with catalog() as db:
+            item = (await db.execute(books_app.select(books_app.SummaryJobItem))).scalar_one()
+            assert (item.status, item.attempts, item.locked_at) == ("pending", 0, None)
+
+        async def broken_sources(db, book_ids):
+            raise RuntimeError("database went away")
+
+        monkeypatch.setattr(books_app, "load_summary_sources", broken_sources)
+        with pytest.raises(RuntimeError):
+            await books_app.process_summary_batch(10)
+        async with catalog() as db:
+            progress = await books_app.summary_job_progress(db, job.id)
+            assert progress["pending"] == 1
+    finally:
+        await client.close()
+
+
+# Test a job needs exactly one of book_ids and missing_only
+@pytest.mark.asyncio
+async def test_create_job_validation(catalog, api_client):
+    async with api_client(catalog, user="tester") as client:
+        assert (await client.post("/summary-jobs/", json={})).status_code == 400
+        response = await client.post("/summary-jobs/", json={"book_ids": [1], "missing_only": True})
+        assert response.status_code == 400
+        response = await client.post("/summary-jobs/", json={"book_ids": [1, 4]})
+        assert response.status_code == 202
+        assert (response.json()["status"], response.json()["total"]) == ("queued", 1)
+
+# Test cancelling stops unfinished items and leaves the job cancelled
+@pytest.mark.asyncio
+async def test_cancel_job(catalog, api_client):
+    async with api_client(catalog, user="tester") as client:
+        job = (await client.post("/summary-jobs/", json={"missing_only": True})).json()
+        response = await client.delete(f"/summary-jobs/{job['job_id']}")
+        assert response.status_code == 200
+        assert (response.json()["status"], response.json()["cancelled"]) == ("cancelled", 2)
+        assert response.json()["finished_at"] is not None
+
+        assert await books_app.process_summary_batch(10) == (0, 0)
+        progress = (await client.get(f"/summary-jobs/{job['job_id']}")).json()
+        assert (progress["status"], progress["pending"], progress["progress"]) == ("cancelled", 0, 1.0)
+
+        assert (await client.delete("/summary-jobs/999")).status_code == 404
+        assert (await client.get("/summary-jobs/999")).status_code == 404
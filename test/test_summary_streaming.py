@@ -0,0 +1,169 @@
+import asyncio
+import importlib.util
+import json
+import time
+
+import httpx
+import pytest
+from llama3_service.streaming import SummaryStreamer
+
+import app as books_app
+from cache import SummaryCache
+from upstream import UpstreamClient
+
+# generate()'s stopping criteria are a transformers class that needs PyTorch, even with a fake model
+requires_torch = pytest.mark.skipif(importlib.util.find_spec("torch") is None, reason="needs PyTorch")
+
+
+class FakeTokenizer:
+    def __call__(self, content, **kwargs):
+        return {"input_ids": content.split()}
+
+
+# Streams each input word back as decoded text; with wait_for_stop, keeps generating until a
+# stopping criterion fires so tests can observe cancellation
+class FakeModel:
+    def __init__(self, fail=False, wait_for_stop=False):
+        self.fail = fail
+        self.wait_for_stop = wait_for_stop
+        self.stopped = False
+
+    def generate(self, input_ids, streamer, stopping_criteria, **kwargs):
+        if self.fail:
+            raise RuntimeError("model error")
+        for word in input_ids:
+            streamer.on_finalized_text(word + " ")
+        deadline = time.monotonic() + 5
+        while self.wait_for_stop and time.monotonic() < deadline:
+            if stopping_criteria[0](None, None):
+                self.stopped = True
+                break
+            time.sleep(0.01)
+        streamer.on_finalized_text("", stream_end=True)
+
+
+class FakeSummarizer:
+    def __init__(self, model):
+        self.tokenizer = FakeTokenizer()
+        self.model = model
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines.get("event", "message"), json.loads(lines["data"])))
+    return events
+
+
+async def collect(stream):
+    return parse_events("".join([event async for event in stream]))
+
+# Test text arrives as data events followed by an end event with the full summary
+@requires_torch
+@pytest.mark.asyncio
+async def test_stream_events():
+    durations = []
+    streamer = SummaryStreamer(FakeSummarizer(FakeModel()), {}, on_generate=durations.append)
+    try:
+        events = await collect(streamer.stream("a short summary"))
+        assert events == [
+            ("message", {"text": "a "}),
+            ("message", {"text": "short "}),
+            ("message", {"text": "summary "}),
+            ("end", {"summary": "a short summary"}),
+        ]
+        assert len(durations) == 1
+    finally:
+        streamer.shutdown()
+
+# Test a generation failure ends the stream with an error event
+@requires_torch
+@pytest.mark.asyncio
+async def test_stream_error():
+    streamer = SummaryStreamer(FakeSummarizer(FakeModel(fail=True)), {})
+    try:
+        events = await collect(streamer.stream("text"))
+        assert events == [("error", {"detail": "Error generating summary: model error"})]
+    finally:
+        streamer.shutdown()
+
+# Test closing the stream mid-generation (client disconnect) stops generate()
+@requires_torch
+@pytest.mark.asyncio
+async def test_disconnect_cancels_generation():
+    model = FakeModel(wait_for_stop=True)
+    streamer = SummaryStreamer(FakeSummarizer(model), {})
+    try:
+        stream = streamer.stream("first second")
+        assert parse_events(await stream.__anext__()) == [("message", {"text": "first "})]
+        await stream.aclose()
+        # The executor has one thread, so this runs once the cancelled generation has returned
+        await asyncio.get_running_loop().run_in_executor(streamer._executor, lambda: None)
+        assert model.stopped
+    finally:
+        streamer.shutdown()
+
+
+# Llama3 service stub that sends its events as separate chunks, like a live stream
+async def relay(request):
+    async def events():
+        yield b'data: {"text": "Hello"}\n\n'
+        yield b'event: end\ndata: {"summary": "Hello"}\n\n'
+    return httpx.Response(200, content=events(), headers={"Content-Type": "text/event-stream"})
+
+
+def make_client(monkeypatch, handler, **kwargs):
+    llama3 = UpstreamClient("llama3", "http://llama3-stub", transport=httpx.MockTransport(handler), retries=0, **kwargs)
+    monkeypatch.setattr(books_app, "llama3_client", llama3)
+    monkeypatch.setattr(books_app, "summary_cache", SummaryCache())
+    return llama3, httpx.AsyncClient(transport=httpx.ASGITransport(app=books_app.app), base_url="http://test")
+
+# Test the API relays the Llama3 service's events unchanged
+@pytest.mark.asyncio
+async def test_api_relays_stream(monkeypatch):
+    llama3, client = make_client(monkeypatch, relay)
+    await llama3.start()
+    try:
+        async with client:
+            response = await client.post("/generate-summary/?stream=true", json={"content": "Some text"})
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert parse_events(response.text) == [("message", {"text": "Hello"}), ("end", {"summary": "Hello"})]
+    finally:
+        await llama3.close()
+
+# Test a cached summary is answered with a single end event, without calling the Llama3 service
+@pytest.mark.asyncio
+async def test_api_streams_cached_summary(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.path)
+        return await relay(request)
+
+    llama3, client = make_client(monkeypatch, handler)
+    await books_app.summary_cache.get_or_compute("Some text", {}, lambda: asyncio.sleep(0, {"summary": "Cached"}))
+    await llama3.start()
+    try:
+        async with client:
+            response = await client.post("/generate-summary/?stream=true", json={"content": "Some text"})
+            assert parse_events(response.text) == [("end", {"summary": "Cached"})]
+            assert calls == []
+    finally:
+        await llama3.close()
+
+# Test a failed connection answers 500, and once the circuit opens 503, instead of a stream
+@pytest.mark.asyncio
+async def test_api_stream_unavailable(monkeypatch):
+    async def failing(request):
+        raise httpx.ConnectError("refused")
+
+    llama3, client = make_client(monkeypatch, failing, failure_threshold=1)
+    await llama3.start()
+    try:
+        async with client:
+            assert (await client.post("/generate-summary/?stream=true", json={"content": "x"})).status_code == 500
+            assert (await client.post("/generate-summary/?stream=true", json={"content": "x"})).status_code == 503
+    finally:
+        await llama3.close()
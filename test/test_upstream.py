@@ -0,0 +1,136 @@
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from upstream import CircuitOpen, UpstreamClient
+
+
+# Local stub of the summary service that fails a configurable number of times first
+def make_stub(failures, status_code=503):
+    stub = FastAPI()
+    stub.state.calls = 0
+
+    @stub.post("/generate-summary/")
+    async def generate_summary(payload: dict):
+        stub.state.calls += 1
+        if stub.state.calls <= failures:
+            raise HTTPException(status_code=status_code, detail="overloaded")
+        return {"summary": payload["content"][:5]}
+
+    return stub
+
+
+def make_client(transport, **kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    return UpstreamClient("stub", "http://stub", transport=transport, **kwargs)
+
+# Test transient 503s are retried for idempotent calls
+@pytest.mark.asyncio
+async def test_retries_overloaded_upstream():
+    stub = make_stub(failures=2)
+    client = make_client(httpx.ASGITransport(app=stub), retries=2)
+    await client.start()
+    try:
+        result = await client.post_json("/generate-summary/", {"content": "hello world"}, idempotent=True)
+        assert result == {"summary": "hello"}
+        assert stub.state.calls == 3
+        assert client.stats()["retries"] == 2
+    finally:
+        await client.close()
+
+# Test non-idempotent calls are not retried after reaching the upstream
+@pytest.mark.asyncio
+async def test_no_retry_when_not_idempotent():
+    stub = make_stub(failures=1)
+    client = make_client(httpx.ASGITransport(app=stub), retries=2)
+    await client.start()
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post_json("/generate-summary/", {"content": "hello"})
+        assert stub.state.calls == 1
+    finally:
+        await client.close()
+
+# Test client errors are neither retried nor counted against the breaker
+@pytest.mark.asyncio
+async def test_client_errors_not_retried():
+    stub = make_stub(failures=1, status_code=422)
+    client = make_client(httpx.ASGITransport(app=stub), retries=2, failure_threshold=1)
+    await client.start()
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post_json("/generate-summary/", {"content": "hello"}, idempotent=True)
+        assert stub.state.calls == 1
+        assert client.breaker.state == "closed"
+    finally:
+        await client.close()
+
+# Test the breaker opens after repeated connection failures and then fails fast
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens():
+    attempts = 0
+
+    def refuse(request):
+        nonlocal attempts
+        attempts += 1
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client = make_client(httpx.MockTransport(refuse), retries=1, failure_threshold=2, reset_timeout=60)
+    await client.start()
+    try:
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await client.post_json("/generate-summary/", {"content": "hello"})
+        assert attempts == 4
+        assert client.breaker.state == "open"
+
+        with pytest.raises(CircuitOpen):
+            await client.post_json("/generate-summary/", {"content": "hello"})
+        assert attempts == 4
+    finally:
+        await client.close()
+
+# Test a successful probe after the reset timeout closes the breaker
+@pytest.mark.asyncio
+async def test_circuit_breaker_recovers():
+    stub = make_stub(failures=1, status_code=500)
+    client = make_client(httpx.ASGITransport(app=stub), retries=0, failure_threshold=1, reset_timeout=0)
+    await client.start()
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post_json("/generate-summary/", {"content": "hello"})
+        assert client.breaker.state == "open"
+        assert await client.post_json("/generate-summary/", {"content": "hello"}) == {"summary": "hello"}
+        assert client.breaker.state == "closed"
+    finally:
+        await client.close()
+
+# Test streamed responses are relayed chunk by chunk and upstream errors surface before relaying
+@pytest.mark.asyncio
+async def test_open_stream():
+    from fastapi.responses import StreamingResponse
+
+    stub = FastAPI()
+
+    @stub.post("/generate-summary/stream")
+    async def stream(payload: dict):
+        if not payload["content"]:
+            raise HTTPException(status_code=422, detail="empty")
+
+        async def events():
+            for word in payload["content"].split():
+                yield f"data: {word}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    client = make_client(httpx.ASGITransport(app=stub))
+    await client.start()
+    try:
+        response = await client.open_stream("/generate-summary/stream", {"content": "one two"})
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+        await response.aclose()
+        assert body == b"data: one\n\ndata: two\n\n"
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.open_stream("/generate-summary/stream", {"content": ""})
+    finally:
+        await client.close()
@@ -0,0 +1,269 @@
+import asyncio
+import contextlib
+import os
+import random
+import time
+
+import httpx
+
+from metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_REQUEST_DURATION
+
+# Status codes worth retrying: the upstream is overloaded or restarting
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+
+# Raised without touching the network while the circuit breaker is open
+class CircuitOpen(Exception):
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit for '{name}' is open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+# Opens after failure_threshold consecutive failures, then lets a single probe through
+# once reset_timeout has passed; the probe's outcome closes or re-opens the circuit.
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_started_at = None
+
+    def before_call(self):
+        if self.state == "closed":
+            return
+        now = time.monotonic()
+        elapsed = now - self.opened_at
+        if self.state == "open" and elapsed >= self.reset_timeout:
+            self.state = "half_open"
+        # A probe that never reported back (e.g. cancelled) is replaced after reset_timeout
+        probe_stale = self._probe_started_at is not None and now - self._probe_started_at >= self.reset_timeout
+        if self.state == "half_open" and (self._probe_started_at is None or probe_stale):
+            self._probe_started_at = now
+            return
+        raise CircuitOpen(self.name, max(self.reset_timeout - elapsed, 0.0))
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_started_at = None
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_started_at = None
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+# App-lifetime HTTP client for an upstream service: pooled keep-alive connections,
+# an overall deadline per call, jittered retries and a circuit breaker.
+class UpstreamClient:
+    def __init__(
+        self,
+        name,
+        base_url,
+        timeout=30.0,
+        connect_timeout=2.0,
+        max_connections=20,
+        max_keepalive_connections=10,
+        keepalive_expiry=30.0,
+        retries=2,
+        backoff=0.2,
+        failure_threshold=5,
+        reset_timeout=30.0,
+        transport=None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.transport = transport
+        self._client = None
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+        self.rejected = 0
+        self._in_flight = UPSTREAM_IN_FLIGHT.labels(name)
+
+    # Reads <PREFIX>_URL, <PREFIX>_TIMEOUT, <PREFIX>_CONNECT_TIMEOUT, <PREFIX>_MAX_CONNECTIONS,
+    # <PREFIX>_MAX_KEEPALIVE, <PREFIX>_RETRIES, <PREFIX>_BREAKER_THRESHOLD and <PREFIX>_BREAKER_RESET
+    @classmethod
+    def from_env(cls, name, prefix, base_url, transport=None):
+        def env(key, default, cast=float):
+            value = os.getenv(f"{prefix}_{key}")
+            return cast(value) if value is not None else default
+
+        return cls(
+            name,
+            os.getenv(f"{prefix}_URL", base_url),
+            timeout=env("TIMEOUT", 30.0),
+            connect_timeout=env("CONNECT_TIMEOUT", 2.0),
+            max_connections=env("MAX_CONNECTIONS", 20, int),
+            max_keepalive_connections=env("MAX_KEEPALIVE", 10, int),
+            retries=env("RETRIES", 2, int),
+            failure_threshold=env("BREAKER_THRESHOLD", 5, int),
+            reset_timeout=env("BREAKER_RESET", 30.0),
+            transport=transport,
+        )
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                transport=self.transport,
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _sleep_time(self, attempt):
+        # Full jitter keeps retrying clients from stampeding a recovering upstream
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    # Times a call into upstream_request_duration_seconds by outcome (success, error, or
+    # rejected by the open breaker) and tracks it in upstream_requests_in_flight
+    @contextlib.contextmanager
+    def _observed(self, path):
+        self._in_flight.inc()
+        started_at = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "success"
+        except CircuitOpen:
+            outcome = "rejected"
+            raise
+        finally:
+            self._in_flight.dec()
+            UPSTREAM_REQUEST_DURATION.labels(self.name, path, outcome).observe(time.perf_counter() - started_at)
+
+    # POST a JSON payload and return the decoded response. Connection failures are always
+    # retried (nothing reached the upstream); timeouts and 502/503/504 only when idempotent.
+    async def post_json(self, path, payload, idempotent=False, deadline=None):
+        with self._observed(path):
+            return await self._post_json(path, payload, idempotent, deadline)
+
+    async def _post_json(self, path, payload, idempotent, deadline):
+        if self._client is None:
+            raise RuntimeError(f"Upstream client '{self.name}' is not started")
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            self.rejected += 1
+            raise
+
+        deadline_at = time.monotonic() + (deadline or self.timeout)
+        self.requests += 1
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            retryable = False
+            try:
+                if remaining <= 0:
+                    raise httpx.TimeoutException(f"Deadline exceeded calling {self.name}")
+                response = await self._client.post(
+                    path, json=payload, timeout=httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining))
+                )
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    retryable = idempotent
+                response.raise_for_status()
+                self.breaker.record_success()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500:
+                    # The upstream is healthy, the request was bad: no retry, no breaker failure
+                    self.breaker.record_success()
+                    raise
+                error = e
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                retryable = True
+                error = e
+            except httpx.TransportError as e:
+                retryable = idempotent
+                error = e
+
+            sleep_for = self._sleep_time(attempt)
+            if not retryable or attempt >= self.retries or time.monotonic() + sleep_for >= deadline_at:
+                self.failures += 1
+                self.breaker.record_failure()
+                raise error
+            attempt += 1
+            self.retried += 1
+            await asyncio.sleep(sleep_for)
+
+    # Open a streaming POST and return the response once its headers arrive, before any of the
+    # body is read. Only connection failures are retried since a stream cannot be replayed.
+    # The caller must close the response (aclose) when done relaying it.
+    async def open_stream(self, path, payload):
+        with self._observed(path):
+            return await self._open_stream(path, payload)
+
+    async def _open_stream(self, path, payload):
+        if self._client is None:
+            raise RuntimeError(f"Upstream client '{self.name}' is not started")
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            self.rejected += 1
+            raise
+
+        self.requests += 1
+        attempt = 0
+        while True:
+            request = self._client.build_request("POST", path, json=payload)
+            try:
+                response = await self._client.send(request, stream=True)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                if attempt >= self.retries:
+                    self.failures += 1
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                self.retried += 1
+                await asyncio.sleep(self._sleep_time(attempt - 1))
+                continue
+            except httpx.TransportError:
+                self.failures += 1
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                self.failures += 1
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if response.is_error:
+                await response.aread()
+                await response.aclose()
+                response.raise_for_status()
+            return response
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "requests": self.requests,
+            "retries": self.retried,
+            "failures": self.failures,
+            "rejected_by_breaker": self.rejected,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+        }